@@ -0,0 +1,271 @@
+import asyncio
+import json
+import os
+from collections import deque
+from urllib.parse import parse_qs
+
+# Admission control for the cipher routes. Every POST under /api/ is given a
+# cost, an estimate of its peak memory from the body length, the cipher and
+# the trace mode, and runs only while the worker stays within its budgets:
+#
+#   ADMISSION_CONTROL         1 to enable, 0 to disable (default 1)
+#   ADMISSION_MAX_CONCURRENT  requests running at once per worker (default 32)
+#   ADMISSION_MEMORY_BUDGET   estimated bytes in use at once per worker (default 1 GiB)
+#   ADMISSION_MAX_BODY        largest request body in bytes (default 256 MiB)
+#   ADMISSION_QUEUE_DEPTH     requests allowed to wait for room (default 128)
+#   ADMISSION_QUEUE_TIMEOUT   seconds a request may wait (default 10)
+#   ADMISSION_RETRY_AFTER     Retry-After seconds sent with a 429 (default 1)
+#   ADMISSION_UNKNOWN_LENGTH  body size assumed without Content-Length (default 1 MiB)
+#
+# A request whose body is over ADMISSION_MAX_BODY, or whose cost alone is over
+# the memory budget, gets 413. Otherwise it waits in a FIFO queue until it
+# fits; a full queue or a wait past the timeout gets 429 with Retry-After.
+# The body is never allowed to outgrow the size it was admitted with
+# (Content-Length, or ADMISSION_UNKNOWN_LENGTH when absent). Streaming routes
+# hold one chunk at a time, so they cost a flat STREAM_COST and have no body
+# limit. Messages on the /api/session WebSocket are admitted one by one
+# against the same budgets.
+ADMISSION_ENABLED = os.getenv("ADMISSION_CONTROL", "1").lower() in ("1", "true", "yes", "on")
+
+# Peak bytes per input byte, measured with tracemalloc on typical text. The
+# space sentinel makes text routes far heavier than the raw /bytes routes,
+# and a full trace keeps every intermediate form of the message.
+COST_FACTORS = {
+    ("rot32", "raw"): 6,
+    ("vigenere", "raw"): 8,
+    ("rot32", "none"): 30,
+    ("vigenere", "none"): 34,
+    ("rot32", "summary"): 30,
+    ("vigenere", "summary"): 34,
+    ("rot32", "full"): 72,
+    ("vigenere", "full"): 82,
+}
+BASE_COST = 64 << 10
+STREAM_COST = 8 << 20
+
+REJECTIONS = ("too_large", "queue_full", "timeout")
+
+
+class Rejected(Exception):
+
+    def __init__(self, status, reason, detail):
+        super().__init__(detail)
+        self.status = status
+        self.reason = reason
+        self.detail = detail
+
+
+def _profile(path, query):
+    # (cipher, mode) for a path under /api/; mode is a trace mode, "raw" for
+    # binary bodies or "stream"
+    parts = path.strip("/").split("/")[1:]
+    cipher = "rot32" if "rot32" in parts else "vigenere"
+    if parts and parts[-1] == "stream":
+        return cipher, "stream"
+    if parts and parts[-1] == "bytes":
+        return cipher, "raw"
+    if len(parts) == 2 and parts[0] in ("encrypt", "decrypt"):
+        steps = parse_qs(query).get("steps", ["full"])[-1]
+        return cipher, steps if steps in ("none", "summary", "full") else "full"
+    return cipher, "none"
+
+
+def estimate(path, query, size):
+    cipher, mode = _profile(path, query)
+    if mode == "stream":
+        return STREAM_COST
+    return BASE_COST + COST_FACTORS[(cipher, mode)] * size
+
+
+def hint(path, query):
+    # What a request over the memory budget can switch to, given what it
+    # already asked for
+    mode = _profile(path, query)[1]
+    if mode in ("summary", "full"):
+        return "use steps=none or the /stream or /bytes routes"
+    if mode == "raw":
+        return "use the /stream routes"
+    return "use the /stream or /bytes routes"
+
+
+def message_cost(cipher, steps, size):
+    # Cost of one WebSocket session message; compact traces cost about as
+    # much as the bare cipher
+    mode = steps if steps in ("summary", "full") else "none"
+    return BASE_COST + COST_FACTORS[(cipher, mode)] * size
+
+
+class AdmissionController:
+    # Budgets of one worker process; all calls happen on its event loop
+
+    def __init__(self, max_concurrent=32, memory_budget=1 << 30, max_body=256 << 20,
+                 queue_depth=128, queue_timeout=10.0, retry_after=1, unknown_length=1 << 20):
+        self.max_concurrent = max_concurrent
+        self.memory_budget = memory_budget
+        self.max_body = max_body
+        self.queue_depth = queue_depth
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.unknown_length = unknown_length
+        self.in_flight = 0
+        self.memory = 0
+        self.admitted = 0
+        self.rejected = dict.fromkeys(REJECTIONS, 0)
+        self._waiters = deque()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_concurrent=int(os.getenv("ADMISSION_MAX_CONCURRENT", 32)),
+            memory_budget=int(os.getenv("ADMISSION_MEMORY_BUDGET", 1 << 30)),
+            max_body=int(os.getenv("ADMISSION_MAX_BODY", 256 << 20)),
+            queue_depth=int(os.getenv("ADMISSION_QUEUE_DEPTH", 128)),
+            queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 10)),
+            retry_after=int(os.getenv("ADMISSION_RETRY_AFTER", 1)),
+            unknown_length=int(os.getenv("ADMISSION_UNKNOWN_LENGTH", 1 << 20)),
+        )
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    def _fits(self, cost):
+        return self.in_flight < self.max_concurrent and self.memory + cost <= self.memory_budget
+
+    def _take(self, cost):
+        self.in_flight += 1
+        self.memory += cost
+        self.admitted += 1
+
+    def check(self, size, cost, hint=None):
+        if size > self.max_body:
+            self.rejected["too_large"] += 1
+            raise Rejected(413, "too_large", f"Request body over the {self.max_body} byte limit")
+        if cost > self.memory_budget:
+            self.rejected["too_large"] += 1
+            detail = f"Request needs an estimated {cost} bytes, over the {self.memory_budget} byte budget"
+            raise Rejected(413, "too_large", f"{detail}; {hint}" if hint else detail)
+
+    async def acquire(self, cost):
+        if not self._waiters and self._fits(cost):
+            self._take(cost)
+            return
+        if len(self._waiters) >= self.queue_depth:
+            self.rejected["queue_full"] += 1
+            raise Rejected(429, "queue_full", "Server is at capacity, retry later")
+        waiter = (cost, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait((waiter[1],), timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if not waiter[1].done():
+            self._abandon(waiter)
+            self.rejected["timeout"] += 1
+            raise Rejected(429, "timeout", "Timed out waiting for capacity, retry later")
+
+    def _abandon(self, waiter):
+        # A waiter that gives up; if it was admitted meanwhile, hand the room back
+        if waiter[1].done():
+            self.release(waiter[0])
+            return
+        waiter[1].cancel()
+        self._waiters.remove(waiter)
+        self._wake()
+
+    def release(self, cost):
+        self.in_flight -= 1
+        self.memory -= cost
+        self._wake()
+
+    def _wake(self):
+        # Strict FIFO: a large request at the head is not overtaken
+        while self._waiters and self._fits(self._waiters[0][0]):
+            cost, future = self._waiters.popleft()
+            self._take(cost)
+            future.set_result(True)
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "memory_in_use": self.memory,
+            "memory_budget": self.memory_budget,
+            "queue_depth": self.queued,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+
+admission = AdmissionController.from_env()
+
+
+class AdmissionMiddleware:
+    # Pure ASGI, like metrics.MetricsMiddleware, so the reservation is held
+    # until a streamed response has sent its last byte. WebSocket sessions
+    # are admitted per message in api.session (see message_cost).
+
+    def __init__(self, app, controller=None):
+        self.app = app
+        self.controller = controller or admission
+
+    async def _reject(self, send, status, detail, retry_after=None):
+        headers = [(b"content-type", b"application/json")]
+        if retry_after is not None:
+            headers.append((b"retry-after", str(retry_after).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": json.dumps({"detail": detail}).encode()})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith("/api/"):
+            return await self.app(scope, receive, send)
+
+        controller = self.controller
+        size = None
+        for name, value in scope.get("headers", ()):
+            if name == b"content-length":
+                try:
+                    size = int(value)
+                except ValueError:
+                    pass
+                break
+        query = scope.get("query_string", b"").decode("latin-1")
+        streaming = _profile(scope["path"], query)[1] == "stream"
+        limit = None if streaming else (size if size is not None else controller.unknown_length)
+        cost = estimate(scope["path"], query, limit or 0)
+        try:
+            # Streaming routes hold one chunk at a time whatever the body size
+            if not streaming:
+                controller.check(size or 0, cost, hint(scope["path"], query))
+            await controller.acquire(cost)
+        except Rejected as e:
+            return await self._reject(send, e.status, e.detail, controller.retry_after if e.status == 429 else None)
+
+        try:
+            if streaming:
+                return await self.app(scope, receive, send)
+            # Read the body here, up to the size it was admitted with, so an
+            # overrun is answered before the app (and its body parser) sees it
+            messages = deque()
+            received = 0
+            while True:
+                message = await receive()
+                if message["type"] != "http.request":
+                    return
+                received += len(message.get("body", b""))
+                if received > limit:
+                    controller.rejected["too_large"] += 1
+                    return await self._reject(send, 413, f"Request body over the {limit} bytes it was admitted with")
+                messages.append(message)
+                if not message.get("more_body", False):
+                    break
+
+            async def replay():
+                if messages:
+                    return messages.popleft()
+                return await receive()
+
+            await self.app(scope, replay, send)
+        finally:
+            controller.release(cost)
@@ -1,9 +1,29 @@
-from fastapi import APIRouter, HTTPException
+import codecs
+import json
+from fastapi import APIRouter, HTTPException, Request, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Literal
 from modules.Rot_Cryp import ROT32Cipher
 from modules.Vige_Cryp import VigenereCipher
-from utils.utils import ALPHABET, char_to_ascii_bits, bits_to_base64, base64_to_bits, ascii_bits_to_char, repeat_key
+from modules.pipeline import run_pipeline
+from modules.incremental import reencrypt, OutputMismatch
+from modules import parallel
+from utils.alphabet import alphabets, AlphabetError
+from utils.utils import remove_spaces, return_spaces, SPACE_SENTINEL
+import metrics
+import step_trace
+from cache import response_cache
+from admission import ADMISSION_ENABLED, Rejected, admission, message_cost
+from session import CipherSession
+from executor import cipher_executor, ExecutorBusy
+
+# orjson is optional; it serializes the large compact traces much faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Initialize ciphers
 rot_cipher = ROT32Cipher()
@@ -11,6 +31,8 @@ vigenere_cipher = VigenereCipher()
 
 router = APIRouter()
 
+StepMode = Literal["none", "summary", "full"]
+
 # Request/Response models
 class EncryptRequest(BaseModel):
     plaintext: str
@@ -33,353 +55,511 @@ class DecryptResponse(BaseModel):
     result: str
     steps: List[TransformationStep]
 
+class BatchItem(BaseModel):
+    op: str
+    cipher: str
+    text: str
+    key: Optional[str] = None
+    alphabet: Optional[str] = None
+
+class BatchResult(BaseModel):
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchResult]
+
+class TraceRequest(BaseModel):
+    text: str
+    key: Optional[str] = None
+
+class PipelineStage(BaseModel):
+    type: str
+    shift: Optional[int] = None
+    key: Optional[str] = None
+
+class PipelineRequest(BaseModel):
+    op: Literal["encrypt", "decrypt"]
+    text: str
+    stages: List[PipelineStage]
+
+class PipelineResponse(BaseModel):
+    result: str
+
+class EditRequest(BaseModel):
+    previous: str
+    output: str
+    start: int
+    end: int
+    text: str
+    key: Optional[str] = None
+
+class PatchResponse(BaseModel):
+    start: int
+    end: int
+    text: str
+
 @router.get("/")
 async def root():
     return {"message": "Encryption Visualizer API"}
 
-@router.post("/encrypt/rot32", response_model=EncryptResponse)
-async def encrypt_rot32(request: EncryptRequest):
+# Every visualization endpoint takes ?steps=none|summary|full (default full);
+# see step_trace for what each mode builds. Large inputs run on the cipher
+# executor; see executor. Results may be served from the response cache; see
+# cache.
+#
+# Every endpoint also takes ?alphabet=<name> to pick one of the configured
+# alphabets (see utils.alphabet); without it the default alphabet is used.
+def _busy(e):
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+def _alphabet(name):
     try:
-        steps = []
-        
-        # Step 1: Original text
-        steps.append(TransformationStep(
-            step="original text",
-            data=request.plaintext,
-            description="Original plaintext input"
-        ))
-        
-        # Step 2: Convert to ASCII bits (8-bit groups)
-        bits = char_to_ascii_bits(request.plaintext)
-        # Format as 8-bit groups for display
-        formatted_bits = ' '.join([bits[i:i+8] for i in range(0, len(bits), 8)])
-        steps.append(TransformationStep(
-            step="ASCII bits (8-bit groups)",
-            data=formatted_bits,
-            description="Each character converted to 8-bit ASCII"
-        ))
-        
-        # Step 3: Show 6-bit grouping (visualization only)
-        # Pad bits to make length divisible by 6
-        padding_needed = (6 - len(bits) % 6) % 6
-        padded_bits = bits + '0' * padding_needed
-        
-        six_bit_groups = [padded_bits[i:i+6] for i in range(0, len(padded_bits), 6)]
-        six_bit_display = ' '.join(six_bit_groups)
-        steps.append(TransformationStep(
-            step="6-bit groups",
-            data=six_bit_display,
-            description=f"Bits grouped into 6-bit chunks (added {padding_needed} padding bits)"
-        ))
-        
-        # Step 4: Convert to Base64 (using your existing function)
-        b64 = bits_to_base64(bits)
-        
-        # Show mapping of 6-bit groups to Base64 chars
-        mapping_display = ""
-        base64_chars = list(b64)
-        for i, (group, char) in enumerate(zip(six_bit_groups[:len(base64_chars)], base64_chars)):
-            if char != '=':
-                idx = ALPHABET.index(char)
-                mapping_display += f"Group {i+1}: {group} → '{char}' (index {idx})\n"
-            else:
-                mapping_display += f"Group {i+1}: {group} → '{char}' (padding)\n"
-        
-        steps.append(TransformationStep(
-            step="Base64 encoding",
-            data=f"Base64: {b64}\n\nMapping:\n{mapping_display}",
-            description="Each 6-bit group mapped to Base64 character"
-        ))
-        
-        # Step 5: Apply ROT32 (using your existing function)
-        result = rot_cipher.encrypt(request.plaintext)
-        
-        # Show ROT32 transformation
-        rot_display = ""
-        for i, (orig_char, new_char) in enumerate(zip(b64, result)):
-            if orig_char != '=':
-                orig_idx = ALPHABET.index(orig_char)
-                new_idx = (orig_idx + 32) % 64
-                rot_display += f"'{orig_char}' (index {orig_idx:2d}) → +32 → '{new_char}' (index {new_idx:2d})\n"
-            else:
-                rot_display += f"'{orig_char}' (padding) → '{new_char}'\n"
-        
-        steps.append(TransformationStep(
-            step="ROT32 rotation",
-            data=f"Ciphertext: {result}\n\nRotation details:\n{rot_display}",
-            description="Each Base64 character rotated by 32 positions"
-        ))
-        
-        return EncryptResponse(result=result, steps=steps)
-    except Exception as e:
+        return alphabets.get(name)
+    except AlphabetError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.post("/decrypt/rot32", response_model=DecryptResponse)
-async def decrypt_rot32(request: DecryptRequest):
+def _rot(alphabet):
+    return rot_cipher if alphabet is None else ROT32Cipher(_alphabet(alphabet))
+
+def _vigenere(alphabet):
+    return vigenere_cipher if alphabet is None else VigenereCipher(_alphabet(alphabet))
+
+async def _visualize(http_request, response_model, cipher, op, text, key, steps, alphabet, fn, *args):
+    metrics.observe_parse(http_request)
+    _alphabet(alphabet)
+    cache_key = None
+    if response_cache.usable(len(text), http_request.headers):
+        cache_key = response_cache.key(cipher, op, text, key, steps, alphabet)
+        cached = await response_cache.fetch(cache_key)
+        if cached is not None:
+            metrics.mark_handled(http_request)
+            return response_model(result=cached[0], steps=cached[1])
+
     try:
-        steps = []
-        
-        # Step 1: Encrypted input
-        steps.append(TransformationStep(
-            step="ciphertext input",
-            data=request.ciphertext,
-            description="Received encrypted text"
-        ))
-        
-        # Step 2: Apply ROT32 decryption
-        b64 = rot_cipher._rot_decrypt(request.ciphertext)
-        
-        # Show ROT32 decryption
-        rot_display = ""
-        for i, (cipher_char, base64_char) in enumerate(zip(request.ciphertext, b64)):
-            if cipher_char != '=':
-                cipher_idx = ALPHABET.index(cipher_char)
-                base64_idx = (cipher_idx - 32) % 64
-                rot_display += f"'{cipher_char}' (index {cipher_idx:2d}) → -32 → '{base64_char}' (index {base64_idx:2d})\n"
-            else:
-                rot_display += f"'{cipher_char}' (padding) → '{base64_char}'\n"
-        
-        steps.append(TransformationStep(
-            step="ROT32 decryption",
-            data=f"Base64: {b64}\n\nRotation details:\n{rot_display}",
-            description="Applied ROT32 decryption to get Base64"
-        ))
-        
-        # DEBUG: Show what base64_to_bits is doing
-        debug_bits = base64_to_bits(b64)
-        steps.append(TransformationStep(
-            step="DEBUG - raw bits from base64_to_bits",
-            data=debug_bits,
-            description="Raw bits output from base64_to_bits()"
-        ))
-        
-        # Show the 6-bit groups from Base64
-        bits_from_b64 = base64_to_bits(b64)
-        
-        # Show the 6-bit groups from Base64
-        six_bit_groups = []
-        temp_bits = bits_from_b64
-        for i in range(0, len(temp_bits), 6):
-            if i+6 <= len(temp_bits):
-                six_bit_groups.append(temp_bits[i:i+6])
-        
-        six_bit_display = ' '.join(six_bit_groups)
-        steps.append(TransformationStep(
-            step="6-bit groups from Base64",
-            data=six_bit_display,
-            description="Base64 decoded back to 6-bit groups"
-        ))
-        
-        # Group into 8-bit ASCII
-        eight_bit_groups = []
-        for i in range(0, len(bits_from_b64), 8):
-            if i+8 <= len(bits_from_b64):
-                eight_bit_groups.append(bits_from_b64[i:i+8])
-        
-        eight_bit_display = ' '.join(eight_bit_groups)
-        steps.append(TransformationStep(
-            step="8-bit ASCII groups",
-            data=eight_bit_display,
-            description="6-bit groups recombined into 8-bit ASCII groups"
-        ))
-        
-        # Convert to text
-        result = rot_cipher.decrypt(request.ciphertext)
-        steps.append(TransformationStep(
-            step="ASCII to text",
-            data=result,
-            description="8-bit groups converted back to characters"
-        ))
-        
-        return DecryptResponse(result=result, steps=steps)
+        result, trace = await cipher_executor.run(len(text), fn, *args)
+    except ExecutorBusy as e:
+        raise _busy(e)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    if cache_key is not None:
+        await response_cache.store(cache_key, (result, trace))
+    metrics.mark_handled(http_request)
+    return response_model(result=result, steps=trace)
+
+@router.post("/encrypt/rot32", response_model=EncryptResponse)
+async def encrypt_rot32(request: EncryptRequest, http_request: Request, steps: StepMode = "full",
+                        alphabet: Optional[str] = None):
+    return await _visualize(
+        http_request, EncryptResponse, "rot32", "encrypt", request.plaintext, None, steps, alphabet,
+        step_trace.rot32_encrypt, request.plaintext, steps, alphabet
+    )
+
+@router.post("/decrypt/rot32", response_model=DecryptResponse)
+async def decrypt_rot32(request: DecryptRequest, http_request: Request, steps: StepMode = "full",
+                        alphabet: Optional[str] = None):
+    return await _visualize(
+        http_request, DecryptResponse, "rot32", "decrypt", request.ciphertext, None, steps, alphabet,
+        step_trace.rot32_decrypt, request.ciphertext, steps, alphabet
+    )
     
 @router.post("/encrypt/vigenere", response_model=EncryptResponse)
-async def encrypt_vigenere(request: EncryptRequest):
+async def encrypt_vigenere(request: EncryptRequest, http_request: Request, steps: StepMode = "full",
+                           alphabet: Optional[str] = None):
     if not request.key:
         raise HTTPException(status_code=400, detail="Key is required for Vigenere cipher")
     
-    try:
-        steps = []
-        
-        # Step 1: Original text and key
-        steps.append(TransformationStep(
-            step="original input",
-            data=f"Plaintext: {request.plaintext}\nKey: {request.key}",
-            description="Original input with encryption key"
-        ))
-        
-        # Step 2: Convert plaintext to ASCII bits
-        m_bits = char_to_ascii_bits(request.plaintext)
-        m_bits_formatted = ' '.join([m_bits[i:i+8] for i in range(0, len(m_bits), 8)])
-        steps.append(TransformationStep(
-            step="plaintext ASCII bits",
-            data=m_bits_formatted,
-            description="Plaintext converted to 8-bit ASCII"
-        ))
-        
-        # Step 3: Convert key to ASCII bits
-        k_bits = char_to_ascii_bits(request.key)
-        k_bits_formatted = ' '.join([k_bits[i:i+8] for i in range(0, len(k_bits), 8)])
-        steps.append(TransformationStep(
-            step="key ASCII bits",
-            data=k_bits_formatted,
-            description="Key converted to 8-bit ASCII"
-        ))
-        
-        # Step 4: Convert plaintext to Base64
-        m_b64_full = bits_to_base64(m_bits)
-        m_b64 = m_b64_full.replace("=", "")  # Your module removes padding
-        steps.append(TransformationStep(
-            step="plaintext Base64",
-            data=f"Full Base64 (with padding): {m_b64_full}\nBase64 (padding removed): {m_b64}",
-            description="Plaintext converted to Base64"
-        ))
-        
-        # Step 5: Convert key to Base64
-        k_b64_full = bits_to_base64(k_bits)
-        k_b64 = k_b64_full.replace("=", "")  # Your module removes padding
-        steps.append(TransformationStep(
-            step="key Base64",
-            data=f"Full Base64 (with padding): {k_b64_full}\nBase64 (padding removed): {k_b64}",
-            description="Key converted to Base64"
-        ))
-        
-        # Step 6: Repeat key to match plaintext length
-        k_b64_repeated = repeat_key(k_b64, len(m_b64))
-        steps.append(TransformationStep(
-            step="key repetition",
-            data=f"Original key Base64: {k_b64}\nRepeated key: {k_b64_repeated}",
-            description=f"Key repeated to match plaintext length ({len(m_b64)} characters)"
-        ))
-        
-        # Step 7: Show Vigenere addition (using your existing function's logic)
-        addition_display = ""
-        result_chars = []
-        
-        for i, (m_char, k_char) in enumerate(zip(m_b64, k_b64_repeated)):
-            mi = ALPHABET.index(m_char)
-            ki = ALPHABET.index(k_char)
-            result_idx = (mi + ki) % 64
-            result_char = ALPHABET[result_idx]
-            result_chars.append(result_char)
-            
-            addition_display += (
-                f"'{m_char}' (idx {mi:2d}) + '{k_char}' (idx {ki:2d}) = {mi + ki:3d} "
-                f"mod 64 = {result_idx:2d} → '{result_char}'\n"
-            )
-        
-        # Get actual result from your module
-        result = vigenere_cipher.encrypt(request.plaintext, request.key)
-        
-        steps.append(TransformationStep(
-            step="Vigenere addition",
-            data=f"Calculation:\n{addition_display}\nResult: {result}",
-            description="Character-wise addition modulo 64"
-        ))
-        
-        return EncryptResponse(result=result, steps=steps)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    return await _visualize(
+        http_request, EncryptResponse, "vigenere", "encrypt", request.plaintext, request.key, steps, alphabet,
+        step_trace.vigenere_encrypt, request.plaintext, request.key, steps, alphabet
+    )
 
 @router.post("/decrypt/vigenere", response_model=DecryptResponse)
-async def decrypt_vigenere(request: DecryptRequest):
+async def decrypt_vigenere(request: DecryptRequest, http_request: Request, steps: StepMode = "full",
+                           alphabet: Optional[str] = None):
     if not request.key:
         raise HTTPException(status_code=400, detail="Key is required for Vigenere cipher")
     
+    return await _visualize(
+        http_request, DecryptResponse, "vigenere", "decrypt", request.ciphertext, request.key, steps, alphabet,
+        step_trace.vigenere_decrypt, request.ciphertext, request.key, steps, alphabet
+    )
+
+# Compact trace endpoint: the core cipher step as parallel arrays of symbols
+# and indices over a window of Base64 positions (see step_trace.compact_trace).
+# ?offset=&limit= select the window; ?result=false leaves out the full result
+# so a viewer can page through a large message cheaply.
+def _json_response(content):
+    if orjson is not None:
+        return Response(content=orjson.dumps(content), media_type="application/json")
+    return Response(
+        content=json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        media_type="application/json"
+    )
+
+@router.post("/trace/{cipher}/{op}")
+async def compact_trace(cipher: Literal["rot32", "vigenere"], op: Literal["encrypt", "decrypt"],
+                        request: TraceRequest, offset: int = 0, limit: int = 1024, result: bool = True,
+                        alphabet: Optional[str] = None):
+    _alphabet(alphabet)
+    try:
+        # Without the result only the text up to the window is touched
+        size = len(request.text) if result else min(len(request.text), max(offset, 0) + limit)
+        full, trace = await cipher_executor.run(
+            size, step_trace.compact_trace,
+            cipher, op, request.text, request.key, offset, limit, alphabet, result
+        )
+    except ExecutorBusy as e:
+        raise _busy(e)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result:
+        trace["result"] = full
+    return _json_response(trace)
+
+# Streaming endpoints: the request body is read chunk by chunk and the result
+# is written back as it is produced, so memory stays flat for any input size.
+# The Vigenere key travels in the X-Cipher-Key header.
+class _RequestStreamingResponse(StreamingResponse):
+    # The body generator consumes the request itself, so StreamingResponse's
+    # disconnect listener must not compete with it for receive(); a client
+    # disconnect surfaces from request.stream() instead.
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+async def _stream_response(request, transformer):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = request.stream()
+    head = []
+    done = False
+    # The first two chunks are transformed before the response starts, so bad
+    # input there gets a 400 like the JSON routes; a body that arrives in one
+    # piece (request.stream() ends with b"") is finished here entirely
+    try:
+        for _ in range(2):
+            chunk = await anext(chunks, b"")
+            if not chunk:
+                head.append(transformer.update(decoder.decode(b"", final=True)) + transformer.finalize())
+                done = True
+                break
+            head.append(transformer.update(decoder.decode(chunk)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def body():
+        for out in head:
+            if out:
+                yield out
+        if done:
+            return
+        try:
+            async for chunk in chunks:
+                out = transformer.update(decoder.decode(chunk))
+                if out:
+                    yield out
+            yield transformer.update(decoder.decode(b"", final=True)) + transformer.finalize()
+        except ValueError:
+            # Too late for a 400 once the headers are out: end the body early
+            return
+
+    return _RequestStreamingResponse(body(), media_type="text/plain")
+
+def _vigenere_header_key(key):
+    if not key:
+        raise HTTPException(status_code=400, detail="Key is required for Vigenere cipher")
+    return key
+
+@router.post("/encrypt/rot32/stream")
+async def encrypt_rot32_stream(request: Request, alphabet: Optional[str] = None):
+    return await _stream_response(request, _rot(alphabet).encryptor())
+
+@router.post("/decrypt/rot32/stream")
+async def decrypt_rot32_stream(request: Request, alphabet: Optional[str] = None):
+    return await _stream_response(request, _rot(alphabet).decryptor())
+
+@router.post("/encrypt/vigenere/stream")
+async def encrypt_vigenere_stream(request: Request, key: Optional[str] = Header(None, alias="X-Cipher-Key"),
+                                  alphabet: Optional[str] = None):
+    cipher = _vigenere(alphabet)
+    try:
+        encryptor = cipher.encryptor(_vigenere_header_key(key))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await _stream_response(request, encryptor)
+
+@router.post("/decrypt/vigenere/stream")
+async def decrypt_vigenere_stream(request: Request, key: Optional[str] = Header(None, alias="X-Cipher-Key"),
+                                  alphabet: Optional[str] = None):
+    cipher = _vigenere(alphabet)
+    try:
+        decryptor = cipher.decryptor(_vigenere_header_key(key))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await _stream_response(request, decryptor)
+
+# Binary endpoints: the raw request body is the payload (application/octet-stream
+# in, Base64 ciphertext out and back), with no JSON, no step trace and no
+# space sentinel. The Vigenere key travels in the X-Cipher-Key header.
+async def _bytes_response(size, media_type, fn, *args):
+    try:
+        result = await cipher_executor.run(size, fn, *args)
+    except ExecutorBusy as e:
+        raise _busy(e)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=result, media_type=media_type)
+
+async def _encrypt_bytes_response(cipher, data, key, alphabet):
+    # Large bodies are split across modules.parallel's process pool; the
+    # request only waits on it, so it skips the cipher executor
+    if not parallel.use_parallel(len(data)):
+        engine = _rot(alphabet) if cipher == "rot32" else _vigenere(alphabet)
+        args = (data,) if key is None else (data, key)
+        return await _bytes_response(len(data), "text/plain", engine.encrypt_bytes, *args)
+    try:
+        result = await run_in_threadpool(parallel.encrypt_bytes, cipher, data, key, alphabet)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=result, media_type="text/plain")
+
+@router.post("/encrypt/rot32/bytes")
+async def encrypt_rot32_bytes(request: Request, alphabet: Optional[str] = None):
+    _alphabet(alphabet)
+    data = await request.body()
+    return await _encrypt_bytes_response("rot32", data, None, alphabet)
+
+@router.post("/decrypt/rot32/bytes")
+async def decrypt_rot32_bytes(request: Request, alphabet: Optional[str] = None):
+    cipher = _rot(alphabet)
+    data = await request.body()
+    return await _bytes_response(len(data), "application/octet-stream", cipher.decrypt_bytes, data)
+
+@router.post("/encrypt/vigenere/bytes")
+async def encrypt_vigenere_bytes(request: Request, key: Optional[str] = Header(None, alias="X-Cipher-Key"),
+                                 alphabet: Optional[str] = None):
+    key = _vigenere_header_key(key)
+    _alphabet(alphabet)
+    data = await request.body()
+    return await _encrypt_bytes_response("vigenere", data, key, alphabet)
+
+@router.post("/decrypt/vigenere/bytes")
+async def decrypt_vigenere_bytes(request: Request, key: Optional[str] = Header(None, alias="X-Cipher-Key"),
+                                 alphabet: Optional[str] = None):
+    key = _vigenere_header_key(key)
+    cipher = _vigenere(alphabet)
+    data = await request.body()
+    return await _bytes_response(len(data), "application/octet-stream", cipher.decrypt_bytes, data, key)
+
+# Fast path: same results as the JSON endpoints with steps=none, without
+# Pydantic. The body is read once and never re-validated or copied into a
+# model. With Content-Type: application/json it is the usual
+# {"plaintext" | "ciphertext", "key"} object, parsed by orjson straight from
+# the raw bytes when installed, and the answer is pre-encoded JSON. Any other
+# content type is the message itself as UTF-8 text (Vigenere key in
+# X-Cipher-Key) and the answer is plain text; ASCII plaintext goes to the
+# cipher as a memoryview of the body without being decoded.
+_SENTINEL_BYTES = SPACE_SENTINEL.encode("ascii")
+
+def _loads(body):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+def _run_fast(op, cipher, key, payload):
+    # payload: text from a JSON body, or the raw body bytes
+    args = () if key is None else (key,)
+    if isinstance(payload, str):
+        return (cipher.encrypt if op == "encrypt" else cipher.decrypt)(payload, *args)
+    if op == "encrypt":
+        if payload.isascii():
+            return cipher.encrypt_bytes(memoryview(payload.replace(b" ", _SENTINEL_BYTES)), *args)
+        return cipher.encrypt(payload.decode("utf-8"), *args)
+    text = cipher.decrypt_bytes(memoryview(payload), *args).decode("latin-1")
+    # Same text handling as ROT32Cipher.decrypt / VigenereCipher.decrypt
+    return remove_spaces(text) if isinstance(cipher, ROT32Cipher) else return_spaces(text)
+
+@router.post("/{op}/{cipher}/fast")
+async def fast(op: Literal["encrypt", "decrypt"], cipher: Literal["rot32", "vigenere"], request: Request,
+               key: Optional[str] = Header(None, alias="X-Cipher-Key"), alphabet: Optional[str] = None):
+    body = await request.body()
+    is_json = request.headers.get("content-type", "").startswith("application/json")
+    if is_json:
+        field = "plaintext" if op == "encrypt" else "ciphertext"
+        try:
+            message = _loads(body)
+            payload = message[field]
+            key = message.get("key", key)
+        except (ValueError, TypeError, KeyError, AttributeError):
+            raise HTTPException(status_code=422, detail=f"Body must be a JSON object with a string {field!r}")
+        if not isinstance(payload, str) or not (key is None or isinstance(key, str)):
+            raise HTTPException(status_code=422, detail=f"Body must be a JSON object with a string {field!r}")
+    else:
+        payload = body
+    metrics.observe_parse(request)
+    if cipher == "rot32":
+        engine, key = _rot(alphabet), None
+    else:
+        key = _vigenere_header_key(key)
+        engine = _vigenere(alphabet)
     try:
-        steps = []
-        
-        # Step 1: Encrypted input and key
-        steps.append(TransformationStep(
-            step="ciphertext input",
-            data=f"Ciphertext: {request.ciphertext}\nKey: {request.key}",
-            description="Received encrypted text with decryption key"
-        ))
-        
-        # Step 2: Convert key to ASCII bits
-        k_bits = char_to_ascii_bits(request.key)
-        k_bits_formatted = ' '.join([k_bits[i:i+8] for i in range(0, len(k_bits), 8)])
-        steps.append(TransformationStep(
-            step="key ASCII bits",
-            data=k_bits_formatted,
-            description="Key converted to 8-bit ASCII"
-        ))
-        
-        # Step 3: Convert key to Base64
-        k_b64_full = bits_to_base64(k_bits)
-        k_b64 = k_b64_full.replace("=", "")
-        steps.append(TransformationStep(
-            step="key Base64",
-            data=f"Full Base64 (with padding): {k_b64_full}\nBase64 (padding removed): {k_b64}",
-            description="Key converted to Base64"
-        ))
-        
-        # Step 4: Repeat key to match ciphertext length
-        k_b64_repeated = repeat_key(k_b64, len(request.ciphertext))
-        steps.append(TransformationStep(
-            step="key repetition",
-            data=f"Original key Base64: {k_b64}\nRepeated key: {k_b64_repeated}",
-            description=f"Key repeated to match ciphertext length ({len(request.ciphertext)} characters)"
-        ))
-        
-        # Step 5: Show Vigenere subtraction
-        subtraction_display = ""
-        m_b64_chars = []
-        
-        for i, (c_char, k_char) in enumerate(zip(request.ciphertext, k_b64_repeated)):
-            ci = ALPHABET.index(c_char)
-            ki = ALPHABET.index(k_char)
-            result_idx = (ci - ki) % 64
-            result_char = ALPHABET[result_idx]
-            m_b64_chars.append(result_char)
-            
-            subtraction_display += (
-                f"'{c_char}' (idx {ci:2d}) - '{k_char}' (idx {ki:2d}) = {ci - ki:3d} "
-                f"mod 64 = {result_idx:2d} → '{result_char}'\n"
-            )
-        
-        m_b64 = ''.join(m_b64_chars)
-        steps.append(TransformationStep(
-            step="Vigenere subtraction",
-            data=f"Calculation:\n{subtraction_display}\nResult Base64: {m_b64}",
-            description="Character-wise subtraction modulo 64"
-        ))
-        
-        # Step 6: Convert Base64 to bits
-        bits_from_b64 = base64_to_bits(m_b64)
-        
-        # Step 7: Show 6-bit groups
-        six_bit_groups = [bits_from_b64[i:i+6] for i in range(0, len(bits_from_b64), 6)]
-        six_bit_display = ' '.join(six_bit_groups)
-        steps.append(TransformationStep(
-            step="6-bit groups",
-            data=six_bit_display,
-            description="Base64 decoded to 6-bit groups"
-        ))
-        
-        # Step 8: Group into 8-bit ASCII
-        eight_bit_groups = []
-        for i in range(0, len(bits_from_b64), 8):
-            if i+8 <= len(bits_from_b64):
-                eight_bit_groups.append(bits_from_b64[i:i+8])
-        
-        eight_bit_display = ' '.join(eight_bit_groups)
-        steps.append(TransformationStep(
-            step="8-bit ASCII groups",
-            data=eight_bit_display,
-            description="6-bit groups recombined into 8-bit ASCII groups"
-        ))
-        
-        # Step 9: Convert to text (using your existing function)
-        result = vigenere_cipher.decrypt(request.ciphertext, request.key)
-        steps.append(TransformationStep(
-            step="ASCII to text",
-            data=result,
-            description="8-bit groups converted back to characters"
-        ))
-        
-        return DecryptResponse(result=result, steps=steps)
+        result = await cipher_executor.run(len(payload), _run_fast, op, engine, key, payload)
+    except ExecutorBusy as e:
+        raise _busy(e)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+    metrics.mark_handled(request)
+    if is_json:
+        return _json_response({"result": result, "steps": []})
+    return Response(content=result, media_type="text/plain; charset=utf-8")
+
+# Batch endpoint: many messages per request, no step trace. Heavy batches
+# run on the cipher executor so they don't hold up the event loop.
+def _require_key(key):
+    if not key:
+        raise ValueError("Key is required for Vigenere cipher")
+    return key
+
+_BATCH_OPS = {
+    ("encrypt", "rot32"): lambda text, key, tables: ROT32Cipher(tables).encrypt(text),
+    ("decrypt", "rot32"): lambda text, key, tables: ROT32Cipher(tables).decrypt(text),
+    ("encrypt", "vigenere"): lambda text, key, tables: VigenereCipher(tables).encrypt(text, _require_key(key)),
+    ("decrypt", "vigenere"): lambda text, key, tables: VigenereCipher(tables).decrypt(text, _require_key(key)),
+}
+
+def run_batch(items):
+    # items: iterable of (op, cipher, text, key, alphabet); returns (result, error) pairs in order
+    results = []
+    for op, cipher, text, key, alphabet in items:
+        fn = _BATCH_OPS.get((op, cipher))
+        if fn is None:
+            results.append((None, f"Unsupported operation: {op} {cipher}"))
+            continue
+        try:
+            results.append((fn(text, key, alphabets.get(alphabet)), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+@router.post("/batch", response_model=BatchResponse)
+async def batch(items: List[BatchItem]):
+    work = [(item.op, item.cipher, item.text, item.key, item.alphabet) for item in items]
+    try:
+        results = await cipher_executor.run(sum(len(item.text) for item in items), run_batch, work)
+    except ExecutorBusy as e:
+        raise _busy(e)
+    return BatchResponse(results=[BatchResult(result=r, error=e) for r, e in results])
+
+# Pipeline endpoint: a chain of layers, e.g. rot32 -> vigenere -> rot, run in
+# one pass over the Base64 indices; see modules.pipeline for the stage types.
+@router.post("/pipeline", response_model=PipelineResponse)
+async def pipeline(request: PipelineRequest, alphabet: Optional[str] = None):
+    _alphabet(alphabet)
+    specs = [stage.model_dump(exclude_none=True) for stage in request.stages]
+    try:
+        result = await cipher_executor.run(len(request.text), run_pipeline, request.op, specs, request.text, alphabet)
+    except ExecutorBusy as e:
+        raise _busy(e)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return PipelineResponse(result=result)
+
+# Incremental encryption: `output` is the ciphertext of `previous`; the edit
+# replaces previous[start:end] with `text`. The response patches the old
+# ciphertext (output[start:end] = text) and only covers the changed blocks.
+@router.post("/encrypt/{cipher}/edit", response_model=PatchResponse)
+async def encrypt_edit(cipher: Literal["rot32", "vigenere"], request: EditRequest,
+                       alphabet: Optional[str] = None):
+    _alphabet(alphabet)
+    # Worst case re-encodes everything after the edit point
+    size = len(request.previous) - min(max(request.start, 0), len(request.previous)) + len(request.text)
+    try:
+        patch = await cipher_executor.run(
+            size, reencrypt, cipher, request.previous, request.output,
+            request.start, request.end, request.text, request.key, alphabet
+        )
+    except ExecutorBusy as e:
+        raise _busy(e)
+    except OutputMismatch as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return PatchResponse(**patch)
+
+# WebSocket session: configure the cipher once, then send any number of
+# messages over the same connection (JSON text frames).
+#
+#   -> {"type": "config", "cipher": "vigenere", "key": "...", "alphabet": null,
+#       "steps": "none" | "summary" | "full" | "compact"}
+#   <- {"type": "ready"}
+#   -> {"type": "encrypt" | "decrypt", "id": 1, "text": "..."}
+#   <- {"type": "result", "id": 1, "result": "..."}
+#   <- {"type": "trace", "id": 1, "steps": ...}    unless steps is "none"
+#
+# A bad message gets {"type": "error", "id": ..., "detail": ...} and the
+# session stays open; a new config message replaces the session state, and
+# one that is rejected clears it until a valid config arrives.
+# Messages go through admission control one at a time: one too large for the
+# memory budget gets an error with "status": 413, and one that finds the
+# worker at capacity gets "status": 429 and "retry": true.
+def _dumps(message):
+    if orjson is not None:
+        return orjson.dumps(message).decode("utf-8")
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+
+@router.websocket("/session")
+async def session(websocket: WebSocket):
+    await websocket.accept()
+    state = None
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            msg_id = None
+            try:
+                message = json.loads(raw)
+                if not isinstance(message, dict):
+                    raise ValueError("Messages must be JSON objects")
+                msg_id = message.get("id")
+                kind = message.get("type")
+                if kind == "config":
+                    # A rejected config ends the previous session too, so
+                    # later text is not run under the old cipher and key
+                    state = None
+                    state = CipherSession(
+                        message.get("cipher"), message.get("key"),
+                        message.get("alphabet"), message.get("steps", "none")
+                    )
+                    await websocket.send_text(_dumps({"type": "ready", "id": msg_id}))
+                    continue
+                if state is None:
+                    raise ValueError("Send a config message first")
+                text = message.get("text")
+                if not isinstance(text, str):
+                    raise ValueError("text must be a string")
+                # Each message is admitted like an HTTP request of its size
+                cost = message_cost(state.cipher, state.steps, len(text)) if ADMISSION_ENABLED else None
+                if cost is not None:
+                    traced = state.steps in ("summary", "full")
+                    admission.check(len(text), cost, "use steps=none" if traced else "send the text in smaller messages")
+                    await admission.acquire(cost)
+                try:
+                    result, trace = await cipher_executor.run(
+                        len(text), state.run, kind, text, message.get("offset", 0), message.get("limit", 1024)
+                    )
+                    await websocket.send_text(_dumps({"type": "result", "id": msg_id, "result": result}))
+                    if trace is not None:
+                        await websocket.send_text(_dumps({"type": "trace", "id": msg_id, "steps": trace}))
+                finally:
+                    if cost is not None:
+                        admission.release(cost)
+            except Rejected as e:
+                await websocket.send_text(_dumps(
+                    {"type": "error", "id": msg_id, "detail": e.detail, "status": e.status, "retry": e.status == 429}
+                ))
+            except ExecutorBusy as e:
+                await websocket.send_text(_dumps({"type": "error", "id": msg_id, "detail": str(e), "retry": True}))
+            except (ValueError, TypeError) as e:
+                await websocket.send_text(_dumps({"type": "error", "id": msg_id, "detail": str(e)}))
+    except WebSocketDisconnect:
+        pass
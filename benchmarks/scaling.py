@@ -0,0 +1,97 @@
+# Regression benchmark: encrypt/decrypt time per byte must stay flat as the
+# payload grows from 1 KB to 100 MB. Quadratic string building shows up as a
+# per-byte cost that climbs with size.
+#
+#   python -m benchmarks.scaling [--max-size 100MB] [--tolerance 3.0]
+import argparse
+import os
+import sys
+import time
+
+from modules.Rot_Cryp import ROT32Cipher
+from modules.Vige_Cryp import VigenereCipher
+
+SIZES = [1 << 10, 10 << 10, 100 << 10, 1 << 20, 10 << 20, 100 << 20]
+# Below this size fixed per-call overhead dominates, so it is not compared
+MIN_COMPARED_SIZE = 64 << 10
+
+
+def parse_size(value):
+    units = {"KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+    value = value.strip().upper()
+    for suffix, factor in units.items():
+        if value.endswith(suffix):
+            return int(float(value[:-len(suffix)]) * factor)
+    return int(value)
+
+
+def make_payload(size):
+    # Printable ASCII without spaces so the sentinel substitution doesn't skew the size
+    raw = os.urandom(size)
+    return raw.translate(bytes(33 + b % 94 for b in range(256))).decode("ascii")
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes, tolerance, repeat_small=5):
+    rot = ROT32Cipher()
+    vig = VigenereCipher()
+    key = "benchmark key"
+    cases = {
+        "rot32.encrypt": lambda m, c: rot.encrypt(m),
+        "rot32.decrypt": lambda m, c: rot.decrypt(c["rot32"]),
+        "vigenere.encrypt": lambda m, c: vig.encrypt(m, key),
+        "vigenere.decrypt": lambda m, c: vig.decrypt(c["vigenere"], key),
+    }
+
+    per_byte = {name: {} for name in cases}
+    for size in sizes:
+        message = make_payload(size)
+        ciphertexts = {"rot32": rot.encrypt(message), "vigenere": vig.encrypt(message, key)}
+        repeat = repeat_small if size < (1 << 20) else 1
+        for name, fn in cases.items():
+            elapsed = best_of(lambda: fn(message, ciphertexts), repeat)
+            per_byte[name][size] = elapsed / size * 1e9
+            print(f"{name:18s} {size:>11d} B  {elapsed * 1e3:10.2f} ms  {per_byte[name][size]:8.2f} ns/B")
+
+    failures = []
+    for name, results in per_byte.items():
+        compared = {size: ns for size, ns in results.items() if size >= MIN_COMPARED_SIZE}
+        if len(compared) < 2:
+            continue
+        baseline = min(compared.values())
+        largest = max(compared)
+        if compared[largest] > baseline * tolerance:
+            failures.append(
+                f"{name}: {compared[largest]:.2f} ns/B at {largest} B vs best {baseline:.2f} ns/B"
+            )
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that cipher cost per byte stays flat as payloads grow")
+    parser.add_argument("--max-size", default="100MB", help="largest payload size (default 100MB)")
+    parser.add_argument("--tolerance", type=float, default=3.0,
+                        help="allowed growth of ns/byte between the best and the largest size")
+    args = parser.parse_args(argv)
+
+    max_size = parse_size(args.max_size)
+    failures = run([s for s in SIZES if s <= max_size], args.tolerance)
+    if failures:
+        print("Non-linear scaling detected:")
+        for failure in failures:
+            print("  " + failure)
+        return 1
+    print("Scaling is linear within tolerance")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
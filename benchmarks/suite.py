@@ -0,0 +1,370 @@
+# Reproducible benchmark suite: micro-benchmarks for the bit-string helpers,
+# the codec and both ciphers, plus an in-process load test of every /api/*
+# route through a minimal ASGI harness (no server, no sockets).
+#
+#   python -m benchmarks.suite --output run.json
+#   python -m benchmarks.suite --quick --compare run.json --threshold 1.25
+#
+# Results are written as JSON keyed by benchmark name; --compare fails with
+# exit status 1 when any benchmark is slower than the baseline by more than
+# the threshold factor.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from benchmarks.scaling import parse_size
+from modules.Rot_Cryp import ROT32Cipher
+from modules.Vige_Cryp import VigenereCipher
+from utils.utils import (
+    char_to_ascii_bits,
+    bits_to_base64,
+    base64_to_bits,
+    ascii_bits_to_char,
+    text_to_base64,
+    base64_to_text
+)
+
+MICRO_SIZES = [16, 256, 4 << 10, 64 << 10, 1 << 20, 16 << 20, 64 << 20]
+HTTP_SIZES = [64, 4 << 10, 64 << 10]
+KEY = "benchmark key"
+
+
+def make_text(size, seed=0):
+    # Deterministic printable ASCII so runs are comparable
+    pattern = bytes(33 + (i * 7 + seed) % 94 for i in range(4096))
+    return (pattern * (size // len(pattern) + 1))[:size].decode("ascii")
+
+
+def measure(fn, min_time=0.2, max_runs=1000):
+    # Repeat fn until min_time has elapsed; returns per-call timings in seconds
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < max_runs:
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+        if time.perf_counter() >= deadline:
+            break
+    return timings
+
+
+def summarize(timings, size):
+    best = min(timings)
+    return {
+        "size": size,
+        "runs": len(timings),
+        "best_s": best,
+        "median_s": statistics.median(timings),
+        "mb_per_s": size / best / (1 << 20) if best else None,
+    }
+
+
+def micro_benchmarks(sizes, min_time):
+    rot = ROT32Cipher()
+    vig = VigenereCipher()
+    results = {}
+    for size in sizes:
+        text = make_text(size)
+        data = text.encode("ascii")
+        bits = char_to_ascii_bits(text)
+        b64 = text_to_base64(text)
+        rot_c = rot.encrypt(text)
+        vig_c = vig.encrypt(text, KEY)
+        cases = {
+            "char_to_ascii_bits": lambda: char_to_ascii_bits(text),
+            "bits_to_base64": lambda: bits_to_base64(bits),
+            "base64_to_bits": lambda: base64_to_bits(b64),
+            "ascii_bits_to_char": lambda: ascii_bits_to_char(bits),
+            "text_to_base64": lambda: text_to_base64(text),
+            "base64_to_text": lambda: base64_to_text(b64),
+            "rot32.encrypt": lambda: rot.encrypt(text),
+            "rot32.decrypt": lambda: rot.decrypt(rot_c),
+            "rot32.encrypt_bytes": lambda: rot.encrypt_bytes(data),
+            "vigenere.encrypt": lambda: vig.encrypt(text, KEY),
+            "vigenere.decrypt": lambda: vig.decrypt(vig_c, KEY),
+            "vigenere.encrypt_bytes": lambda: vig.encrypt_bytes(data, KEY),
+        }
+        for name, fn in cases.items():
+            key = f"micro/{name}/{size}"
+            results[key] = summarize(measure(fn, min_time, max_runs=1000 if size < (1 << 20) else 5), size)
+            print(f"{key:45s} {results[key]['best_s'] * 1e3:10.3f} ms  {results[key]['mb_per_s']:9.1f} MB/s")
+    return results
+
+
+async def asgi_request(app, method, path, body=b"", headers=(), query=""):
+    # One request through the ASGI app; returns (status, body)
+    done = asyncio.Event()
+    request_sent = False
+    status = None
+    chunks = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"content-length", str(len(body)).encode())] + [
+            (k.lower().encode(), v.encode("latin-1")) for k, v in headers
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+async def asgi_session(app, path, frames):
+    # One WebSocket session: connect, send the text frames, disconnect once
+    # the app has read them all; returns (200 unless any reply is an error, replies)
+    incoming = [{"type": "websocket.connect"}]
+    incoming += [{"type": "websocket.receive", "text": frame} for frame in frames]
+    incoming.append({"type": "websocket.disconnect", "code": 1000})
+    replies = []
+    accepted = False
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        nonlocal accepted
+        if message["type"] == "websocket.accept":
+            accepted = True
+        elif message["type"] == "websocket.send":
+            replies.append(json.loads(message["text"]))
+
+    scope = {
+        "type": "websocket",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "scheme": "ws",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "subprotocols": [],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+    await app(scope, receive, send)
+    ok = accepted and all(reply.get("type") != "error" for reply in replies)
+    return (200 if ok else 500), replies
+
+
+def http_cases(size):
+    # (name, method, path, body, headers, query) for every /api/* route; the
+    # WS method is one /api/session run with body as its list of frames
+    text = make_text(size, seed=1)
+    rot = ROT32Cipher()
+    vig = VigenereCipher()
+    rot_c = rot.encrypt(text)
+    vig_c = vig.encrypt(text, KEY)
+    json_headers = [("content-type", "application/json")]
+    key_header = [("x-cipher-key", KEY)]
+    cases = [("root", "GET", "/api/", b"", [], "")]
+    for steps in ("none", "full"):
+        cases += [
+            (f"encrypt_rot32[{steps}]", "POST", "/api/encrypt/rot32",
+             json.dumps({"plaintext": text}).encode(), json_headers, f"steps={steps}"),
+            (f"decrypt_rot32[{steps}]", "POST", "/api/decrypt/rot32",
+             json.dumps({"ciphertext": rot_c}).encode(), json_headers, f"steps={steps}"),
+            (f"encrypt_vigenere[{steps}]", "POST", "/api/encrypt/vigenere",
+             json.dumps({"plaintext": text, "key": KEY}).encode(), json_headers, f"steps={steps}"),
+            (f"decrypt_vigenere[{steps}]", "POST", "/api/decrypt/vigenere",
+             json.dumps({"ciphertext": vig_c, "key": KEY}).encode(), json_headers, f"steps={steps}"),
+        ]
+    cases += [
+        ("encrypt_rot32_stream", "POST", "/api/encrypt/rot32/stream", text.encode(), [], ""),
+        ("decrypt_rot32_stream", "POST", "/api/decrypt/rot32/stream", rot_c.encode(), [], ""),
+        ("encrypt_vigenere_stream", "POST", "/api/encrypt/vigenere/stream", text.encode(), key_header, ""),
+        ("decrypt_vigenere_stream", "POST", "/api/decrypt/vigenere/stream", vig_c.encode(), key_header, ""),
+        ("encrypt_rot32_bytes", "POST", "/api/encrypt/rot32/bytes", text.encode(), [], ""),
+        ("decrypt_rot32_bytes", "POST", "/api/decrypt/rot32/bytes", rot_c.encode(), [], ""),
+        ("encrypt_vigenere_bytes", "POST", "/api/encrypt/vigenere/bytes", text.encode(), key_header, ""),
+        ("decrypt_vigenere_bytes", "POST", "/api/decrypt/vigenere/bytes", vig_c.encode(), key_header, ""),
+        ("batch", "POST", "/api/batch", json.dumps([
+            {"op": "encrypt", "cipher": "vigenere", "text": text[i:i + 64], "key": KEY}
+            for i in range(0, len(text), 64)
+        ]).encode(), json_headers, ""),
+        ("pipeline", "POST", "/api/pipeline", json.dumps({
+            "op": "encrypt", "text": text,
+            "stages": [{"type": "rot", "shift": 5}, {"type": "vigenere", "key": KEY}, {"type": "rot32"}]
+        }).encode(), json_headers, ""),
+        ("trace_vigenere", "POST", "/api/trace/vigenere/encrypt",
+         json.dumps({"text": text, "key": KEY}).encode(), json_headers, "limit=256"),
+        ("trace_vigenere[window]", "POST", "/api/trace/vigenere/encrypt",
+         json.dumps({"text": text, "key": KEY}).encode(), json_headers, "limit=256&result=false"),
+        ("edit_rot32[append]", "POST", "/api/encrypt/rot32/edit", json.dumps({
+            "previous": text, "output": rot_c, "start": len(text), "end": len(text), "text": " appended"
+        }).encode(), json_headers, ""),
+        ("edit_vigenere[append]", "POST", "/api/encrypt/vigenere/edit", json.dumps({
+            "previous": text, "output": vig_c, "start": len(text), "end": len(text), "text": " appended", "key": KEY
+        }).encode(), json_headers, ""),
+        ("edit_vigenere[middle]", "POST", "/api/encrypt/vigenere/edit", json.dumps({
+            "previous": text, "output": vig_c, "start": len(text) // 2, "end": len(text) // 2 + 1, "text": "#",
+            "key": KEY
+        }).encode(), json_headers, ""),
+        ("session_vigenere", "WS", "/api/session", [
+            json.dumps({"type": "config", "cipher": "vigenere", "key": KEY}),
+            json.dumps({"type": "encrypt", "id": 1, "text": text}),
+            json.dumps({"type": "decrypt", "id": 2, "text": vig_c}),
+        ], [], ""),
+    ]
+    for cipher, ciphertext, headers in (("rot32", rot_c, []), ("vigenere", vig_c, key_header)):
+        cases += [
+            (f"encrypt_{cipher}_fast[json]", "POST", f"/api/encrypt/{cipher}/fast",
+             json.dumps({"plaintext": text}).encode(), json_headers + headers, ""),
+            (f"decrypt_{cipher}_fast[json]", "POST", f"/api/decrypt/{cipher}/fast",
+             json.dumps({"ciphertext": ciphertext}).encode(), json_headers + headers, ""),
+            (f"encrypt_{cipher}_fast[text]", "POST", f"/api/encrypt/{cipher}/fast", text.encode(), headers, ""),
+            (f"decrypt_{cipher}_fast[text]", "POST", f"/api/decrypt/{cipher}/fast", ciphertext.encode(), headers, ""),
+        ]
+    return cases
+
+
+async def load_test(app, method, path, body, headers, query, requests, concurrency):
+    latencies = []
+    errors = 0
+    queue = list(range(requests))
+
+    async def worker():
+        nonlocal errors
+        while queue:
+            queue.pop()
+            start = time.perf_counter()
+            if method == "WS":
+                status, _ = await asgi_session(app, path, body)
+            else:
+                status, _ = await asgi_request(app, method, path, body, headers, query)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "req_per_s": requests / elapsed,
+        "p50_s": latencies[len(latencies) // 2],
+        "p99_s": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        # Compared against baselines like the micro results
+        "best_s": latencies[len(latencies) // 2],
+    }
+
+
+def http_benchmarks(sizes, requests, concurrency):
+    from main import app
+    from executor import cipher_executor
+
+    async def run_all():
+        results = {}
+        for size in sizes:
+            for name, method, path, body, headers, query in http_cases(size):
+                key = f"http/{name}/{size}"
+                results[key] = await load_test(app, method, path, body, headers, query, requests, concurrency)
+                r = results[key]
+                print(f"{key:45s} {r['req_per_s']:9.1f} req/s  p50 {r['p50_s'] * 1e3:8.3f} ms"
+                      f"  p99 {r['p99_s'] * 1e3:8.3f} ms  errors {r['errors']}")
+        return results
+
+    try:
+        return asyncio.run(run_all())
+    finally:
+        cipher_executor.shutdown()
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("best_s") or result.get("best_s") is None:
+            continue
+        ratio = result["best_s"] / base["best_s"]
+        if ratio > threshold:
+            regressions.append(f"{name}: {ratio:.2f}x slower ({base['best_s']:.6f}s -> {result['best_s']:.6f}s)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the codec, the ciphers and the HTTP routes")
+    parser.add_argument("--max-size", default="64MB", help="largest micro-benchmark payload (default 64MB)")
+    parser.add_argument("--quick", action="store_true", help="payloads up to 64KB and fewer HTTP requests")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent per micro-benchmark")
+    parser.add_argument("--requests", type=int, default=200, help="requests per HTTP benchmark")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent in-flight HTTP requests")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-http", action="store_true")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON produced by an earlier --output")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown factor against the baseline that counts as a regression")
+    args = parser.parse_args(argv)
+
+    max_size = parse_size("64KB" if args.quick else args.max_size)
+    requests = min(args.requests, 50) if args.quick else args.requests
+
+    results = {}
+    if not args.skip_micro:
+        results.update(micro_benchmarks([s for s in MICRO_SIZES if s <= max_size], args.min_time))
+    if not args.skip_http:
+        results.update(http_benchmarks([s for s in HTTP_SIZES if s <= max_size], requests, args.concurrency))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import hashlib
+from abc import ABC, abstractmethod
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+
+# Response cache for the visualization endpoints. Both ciphers are
+# deterministic, so a (cipher, op, text, key, steps) tuple always produces the
+# same result and trace. Entries are keyed by a keyed BLAKE2 digest of those
+# inputs, so plaintexts and cipher keys never sit in the key space.
+#
+#   RESPONSE_CACHE           off | memory | disk (default off)
+#   RESPONSE_CACHE_SIZE      maximum entries (default 4096)
+#   RESPONSE_CACHE_BYTES     memory backend: maximum serialized size of all
+#                            entries in bytes (default 64 MiB)
+#   RESPONSE_CACHE_TTL       seconds an entry stays valid, 0 for no expiry (default 300)
+#   RESPONSE_CACHE_MAX_ITEM  largest input in characters that is cached (default 65536)
+#   RESPONSE_CACHE_PATH      sqlite file for the disk backend (default response_cache.sqlite3)
+#   RESPONSE_CACHE_SECRET    digest key; required for the disk backend so every
+#                            worker (and restart) computes the same keys
+#                            (memory backend default: random per process)
+#
+# A request with `Cache-Control: no-store` neither reads nor fills the cache.
+CACHE_BACKENDS = ("off", "memory", "disk")
+
+
+class CacheBackend(ABC):
+    # get(key) -> value or None; set(key, value, encoded) stores (result,
+    # steps), with `encoded` its JSON text. Blocking backends are called from
+    # a worker thread rather than the event loop.
+    blocking = False
+
+    @abstractmethod
+    def get(self, key):
+        pass
+
+    @abstractmethod
+    def set(self, key, value, encoded):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    @abstractmethod
+    def __len__(self):
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    # In-process LRU with per-entry expiry, bounded both by entry count and
+    # by the serialized size of the entries
+
+    def __init__(self, capacity=4096, ttl=300, max_bytes=64 << 20):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, size, value = entry
+            if expires and expires < time.monotonic():
+                del self._entries[key]
+                self.bytes -= size
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, encoded):
+        size = len(encoded)
+        if size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (expires, size, value)
+            self.bytes += size
+            while len(self._entries) > self.capacity or self.bytes > self.max_bytes:
+                self.bytes -= self._entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskBackend(CacheBackend):
+    # sqlite3 store shared by every worker on the host. Values are JSON;
+    # least recently used rows are dropped past the capacity, checked every
+    # TRIM_EVERY writes rather than on each one.
+    blocking = True
+    TRIM_EVERY = 64
+
+    def __init__(self, path="response_cache.sqlite3", capacity=4096, ttl=300):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key BLOB PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, expires FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires = row
+            if expires and expires < now:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+        result, steps = json.loads(value)
+        return result, steps
+
+    def set(self, key, value, encoded):
+        now = time.time()
+        expires = now + self.ttl if self.ttl else 0
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires, used) VALUES (?, ?, ?, ?)",
+                (key, encoded, expires, now)
+            )
+            self._writes += 1
+            if self._writes % self.TRIM_EVERY == 0:
+                # Everything past the `capacity` most recently used rows
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                    (self.capacity,)
+                )
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class ResponseCache:
+
+    def __init__(self, backend=None, max_item=64 * 1024, secret=None):
+        self.backend = backend
+        self.max_item = max_item
+        self._secret = secret or os.urandom(32)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        kind = os.getenv("RESPONSE_CACHE", "off")
+        if kind not in CACHE_BACKENDS:
+            raise ValueError(f"RESPONSE_CACHE must be one of {', '.join(CACHE_BACKENDS)}, got {kind!r}")
+        capacity = int(os.getenv("RESPONSE_CACHE_SIZE", 4096))
+        ttl = float(os.getenv("RESPONSE_CACHE_TTL", 300))
+        secret = os.getenv("RESPONSE_CACHE_SECRET")
+        backend = None
+        if kind == "memory":
+            backend = MemoryBackend(capacity, ttl, int(os.getenv("RESPONSE_CACHE_BYTES", 64 << 20)))
+        elif kind == "disk":
+            # A per-process random secret would give every worker its own key
+            # space in the shared file
+            if not secret:
+                raise ValueError("RESPONSE_CACHE_SECRET is required with RESPONSE_CACHE=disk")
+            backend = DiskBackend(os.getenv("RESPONSE_CACHE_PATH", "response_cache.sqlite3"), capacity, ttl)
+        return cls(
+            backend,
+            max_item=int(os.getenv("RESPONSE_CACHE_MAX_ITEM", 64 * 1024)),
+            secret=secret.encode() if secret else None,
+        )
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def key(self, *parts):
+        # Length-prefixed so ("ab", "c") and ("a", "bc") differ
+        h = hashlib.blake2b(key=self._secret[:64], digest_size=32)
+        for part in parts:
+            data = (part or "").encode("utf-8", "surrogatepass")
+            h.update(len(data).to_bytes(8, "little"))
+            h.update(data)
+        return h.digest()
+
+    def usable(self, size, headers=None):
+        if self.backend is None or size > self.max_item:
+            return False
+        if headers is not None and "no-store" in headers.get("cache-control", "").lower():
+            return False
+        return True
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value, json.dumps(value))
+
+    # For the event loop: blocking backends run on a worker thread
+    async def fetch(self, key):
+        if self.backend.blocking:
+            return await run_in_threadpool(self.get, key)
+        return self.get(key)
+
+    async def store(self, key, value):
+        if self.backend.blocking:
+            return await run_in_threadpool(self.set, key, value)
+        return self.set(key, value)
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__ if self.backend else None,
+                "size": len(self.backend) if self.backend else 0,
+                "bytes": getattr(self.backend, "bytes", None),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache.from_env()
@@ -0,0 +1,365 @@
+# Offline bulk encryption of files, directory trees and stdin.
+#
+#   python cli.py encrypt rot32 dump.bin -o dump.txt
+#   python cli.py decrypt vigenere --key secret dump.txt -o dump.bin
+#   python cli.py encrypt vigenere --key secret -r exports/ -o exports.enc/
+#   cat notes.txt | python cli.py encrypt rot32 --text > notes.enc
+#
+# By default files are treated as raw bytes, with output identical to the
+# /api/{encrypt,decrypt}/{rot32,vigenere}/bytes endpoints. --text treats the
+# input as UTF-8 text with output identical to the JSON endpoints.
+#
+# Files are read through mmap and cut into chunks on 3-byte (plaintext) or
+# 4-symbol (ciphertext) boundaries, so every chunk encodes independently; the
+# Vigenere key phase of each chunk follows from its offset. Chunks run on a
+# process pool and are written back in order. Progress and throughput go to
+# stderr, counted in input bytes.
+#
+# Text input, and ciphertext in an alphabet with multi-byte symbols, is
+# decoded from UTF-8 chunk by chunk as well. Text with characters above
+# U+00FF takes the ciphers' bit-string path from the first such character
+# on; Latin-1 characters have the same bits on both paths, so the output up
+# to there stands and the rest is cut on 24-bit boundaries instead.
+import argparse
+import codecs
+import mmap
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.Rot_Cryp import ROT32Cipher
+from modules.Vige_Cryp import VigenereCipher
+from utils.alphabet import alphabets, AlphabetError
+from utils.utils import (
+    bytes_to_base64,
+    base64_to_bytes,
+    bits_to_base64,
+    bytes_to_bits,
+    char_to_ascii_bits,
+    remove_spaces,
+    SpaceRestorer
+)
+
+# Multiple of 12 so chunks hold whole 3-byte and 4-symbol blocks
+DEFAULT_CHUNK_SIZE = 4 << 20
+
+
+def encrypt_chunk(cipher, key, alphabet, data, offset):
+    # offset: position of the chunk's first Base64 symbol in the whole output
+    tables = alphabets.get(alphabet)
+    if cipher == "rot32":
+        return ROT32Cipher(tables).encrypt_bytes(data)
+    b64 = bytes_to_base64(data, tables).rstrip('=')
+    return VigenereCipher._shift(b64, VigenereCipher._key_schedule(key), 1, offset, tables)
+
+
+def encrypt_bits_chunk(cipher, key, alphabet, bits, offset):
+    # Bit-string path for text above U+00FF; bits is a whole number of
+    # 4-symbol blocks except at the end of the input
+    tables = alphabets.get(alphabet)
+    if cipher == "rot32":
+        return bits_to_base64(bits, tables.rot32)
+    b64 = bits_to_base64(bits, tables).rstrip('=')
+    return VigenereCipher._shift(b64, VigenereCipher._key_schedule(key), 1, offset, tables)
+
+
+def decrypt_chunk(cipher, key, alphabet, symbols, offset):
+    tables = alphabets.get(alphabet)
+    if cipher == "rot32":
+        return ROT32Cipher(tables).decrypt_bytes(symbols)
+    m_b64 = VigenereCipher._shift(symbols, VigenereCipher._key_schedule(key), -1, offset, tables)
+    return base64_to_bytes(m_b64, tables)
+
+
+class Progress:
+    # One self-overwriting stderr line, refreshed at most every `interval` seconds
+
+    def __init__(self, label, total, quiet=False, interval=0.2):
+        self.label = label
+        self.total = total
+        self.quiet = quiet
+        self.interval = interval
+        self.done = 0
+        self.start = time.perf_counter()
+        self._shown = 0.0
+
+    def _line(self):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        rate = self.done / elapsed / (1 << 20)
+        size = f"{self.done / (1 << 20):.1f}"
+        if self.total:
+            size += f"/{self.total / (1 << 20):.1f} MB ({100 * self.done / self.total:5.1f}%)"
+        else:
+            size += " MB"
+        return f"{self.label}: {size} {rate:.1f} MB/s"
+
+    def update(self, n):
+        self.done += n
+        now = time.perf_counter()
+        if not self.quiet and now - self._shown >= self.interval:
+            self._shown = now
+            sys.stderr.write("\r" + self._line())
+            sys.stderr.flush()
+
+    def finish(self):
+        if not self.quiet:
+            sys.stderr.write("\r" + self._line() + f" in {time.perf_counter() - self.start:.2f}s\n")
+            sys.stderr.flush()
+
+
+def _ordered(pool, jobs, depth, progress):
+    # Results of fn(*args) for each (fn, args, weight) job, in job order, with
+    # at most `depth` jobs in flight; weight (input bytes) is counted once the
+    # job's result is in
+    if pool is None:
+        for fn, args, weight in jobs:
+            result = fn(*args)
+            progress.update(weight)
+            yield result
+        return
+    pending = deque()
+    for fn, args, weight in jobs:
+        pending.append((weight, pool.submit(fn, *args)))
+        if len(pending) >= depth:
+            weight, future = pending.popleft()
+            result = future.result()
+            progress.update(weight)
+            yield result
+    while pending:
+        weight, future = pending.popleft()
+        result = future.result()
+        progress.update(weight)
+        yield result
+
+
+def _slices(data, size):
+    # (chunk, start) over bytes, mmap or str
+    for start in range(0, len(data), size):
+        yield data[start:start + size], start
+
+
+def _read_chunks(stream, size):
+    start = 0
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            return
+        yield chunk, start
+        start += len(chunk)
+
+
+class _Source:
+    # Input file (mmapped), or stdin read in chunk-sized pieces
+
+    def __init__(self, path):
+        self.path = path
+        self._file = self._map = None
+        if path == "-":
+            self.size = None
+            return
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        if self.size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def chunks(self, size):
+        if self.path == "-":
+            return _read_chunks(sys.stdin.buffer, size)
+        if self._map is None:
+            return iter(())
+        return _slices(self._map, size)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def _encrypt_jobs(args, chunks):
+    for data, start in chunks:
+        yield encrypt_chunk, (args.cipher, args.key, args.alphabet, bytes(data), start // 3 * 4), len(data)
+
+
+def _text_encrypt_jobs(args, chunks):
+    # Like the JSON endpoints: spaces expanded, one byte per character up to
+    # U+00FF, the bit-string path from the first character above it
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    cipher = (args.cipher, args.key, args.alphabet)
+    pending = b""   # bytes short of a 3-byte block
+    bits = None     # on the bit-string path: bits short of a 4-symbol block
+    symbols = 0     # Base64 symbols produced so far
+    weight = 0
+    for data, _ in chunks:
+        text = remove_spaces(decoder.decode(data))
+        weight += len(data)
+        if bits is None:
+            try:
+                block = pending + text.encode("latin-1")
+            except UnicodeEncodeError:
+                bits = bytes_to_bits(pending)
+            else:
+                cut = len(block) - len(block) % 3
+                pending = block[cut:]
+                if cut:
+                    yield encrypt_chunk, cipher + (block[:cut], symbols), weight
+                    symbols += cut // 3 * 4
+                    weight = 0
+                continue
+        bits += char_to_ascii_bits(text)
+        cut = len(bits) - len(bits) % 24
+        if cut:
+            yield encrypt_bits_chunk, cipher + (bits[:cut], symbols), weight
+            symbols += cut // 6
+            weight = 0
+            bits = bits[cut:]
+    # Raises on a truncated UTF-8 sequence at the end of the input
+    decoder.decode(b"", final=True)
+    if bits is None:
+        yield encrypt_chunk, cipher + (pending, symbols), weight
+    else:
+        yield encrypt_bits_chunk, cipher + (bits, symbols), weight
+
+
+def _text_chunks(chunks):
+    # UTF-8 decoded chunk by chunk and cut on 4-symbol boundaries; yields
+    # (symbols, start, input bytes)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    start = 0
+    for data, _ in chunks:
+        pending += decoder.decode(data)
+        cut = len(pending) - len(pending) % 4
+        yield pending[:cut], start, len(data)
+        start += cut
+        pending = pending[cut:]
+    yield pending + decoder.decode(b"", final=True), start, 0
+
+
+def _decrypt_jobs(args, chunks):
+    for symbols, start, weight in chunks:
+        if not isinstance(symbols, str):
+            symbols = bytes(symbols).decode("utf-8", "replace")
+        yield decrypt_chunk, (args.cipher, args.key, args.alphabet, symbols, start), weight
+
+
+def process(args, source, out, pool):
+    # Run one input through the cipher, writing the result to the binary stream `out`
+    size = args.chunk_size
+    progress = Progress(args.label, source.size, args.quiet)
+    depth = 2 * args.workers
+
+    if args.op == "encrypt":
+        if args.text:
+            jobs = _text_encrypt_jobs(args, source.chunks(size))
+        else:
+            jobs = _encrypt_jobs(args, source.chunks(size))
+        for result in _ordered(pool, jobs, depth, progress):
+            out.write(result.encode("utf-8"))
+        progress.finish()
+        return
+
+    # Decrypt: ciphertext is cut into 4-symbol blocks. Non-ASCII alphabets
+    # have multi-byte symbols, so their input is decoded and cut as text.
+    symbol_chunks = size // 3 * 4
+    if alphabets.get(args.alphabet).is_ascii:
+        chunks = ((data, start, len(data)) for data, start in source.chunks(symbol_chunks))
+    else:
+        chunks = _text_chunks(source.chunks(symbol_chunks))
+
+    results = _ordered(pool, _decrypt_jobs(args, chunks), depth, progress)
+    if not args.text:
+        for data in results:
+            out.write(data)
+    elif args.cipher == "rot32":
+        # Matches ROT32Cipher.decrypt, which re-applies remove_spaces
+        for data in results:
+            out.write(remove_spaces(data.decode("latin-1")).encode("utf-8"))
+    else:
+        spaces = SpaceRestorer()
+        for data in results:
+            out.write(spaces.update(data.decode("latin-1")).encode("utf-8"))
+        out.write(spaces.finalize().encode("utf-8"))
+    progress.finish()
+
+
+def _targets(inputs, output, recursive):
+    # (input path, output path or None for stdout) pairs
+    many = len(inputs) > 1 or any(os.path.isdir(path) for path in inputs)
+    if many and not output:
+        raise ValueError("--output DIR is required for several inputs or a directory")
+    for path in inputs:
+        if os.path.isdir(path):
+            if not recursive:
+                raise ValueError(f"{path} is a directory; use -r to process directory trees")
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    src = os.path.join(root, name)
+                    yield src, os.path.join(output, os.path.relpath(src, path))
+        elif many:
+            yield path, os.path.join(output, os.path.basename(path))
+        else:
+            yield path, output
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Encrypt or decrypt files, directory trees and stdin")
+    parser.add_argument("op", choices=["encrypt", "decrypt"])
+    parser.add_argument("cipher", choices=["rot32", "vigenere"])
+    parser.add_argument("inputs", nargs="*", default=["-"], help="files or directories; - or nothing for stdin")
+    parser.add_argument("-o", "--output", help="output file, or directory for several inputs (default stdout)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="process directory trees")
+    parser.add_argument("--key", default=os.getenv("CIPHER_KEY"), help="Vigenere key (default: CIPHER_KEY env var)")
+    parser.add_argument("--alphabet", help="named alphabet (ALPHABET_TABLE_<NAME>); default ALPHABET_TABLE")
+    parser.add_argument("--text", action="store_true",
+                        help="treat input as UTF-8 text like the JSON endpoints instead of raw bytes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: CPU count; 1 runs inline)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="plaintext bytes per chunk, rounded down to a multiple of 12 (default 4 MiB)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress output")
+    args = parser.parse_intermixed_args(argv)
+    if args.cipher == "vigenere" and not args.key:
+        parser.error("Key is required for Vigenere cipher (--key or CIPHER_KEY)")
+    args.chunk_size = max(12, args.chunk_size - args.chunk_size % 12)
+    args.workers = max(1, args.workers)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        alphabets.get(args.alphabet)
+        targets = list(_targets(args.inputs, args.output, args.recursive))
+    except (AlphabetError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    pool = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    try:
+        for src, dst in targets:
+            args.label = "stdin" if src == "-" else src
+            source = _Source(src)
+            try:
+                if dst is None:
+                    process(args, source, sys.stdout.buffer, pool)
+                    sys.stdout.buffer.flush()
+                else:
+                    os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+                    with open(dst, "wb") as out:
+                        process(args, source, out, pool)
+            finally:
+                source.close()
+    except (ValueError, UnicodeDecodeError) as e:
+        print(f"\nerror: {args.label}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+# Where CPU-bound cipher work runs. Requests below the offload threshold run
+# inline on the event loop, since a pool hop costs more than they do; larger
+# ones go to a thread or process pool.
+#
+#   CIPHER_EXECUTOR           inline | thread | process (default thread)
+#   CIPHER_POOL_SIZE          pool workers (default: CPU count)
+#   CIPHER_QUEUE_DEPTH        offloaded jobs allowed to wait for a worker (default 64)
+#   CIPHER_OFFLOAD_THRESHOLD  input characters at which work is offloaded (default 65536)
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+
+class ExecutorBusy(Exception):
+    pass
+
+
+class CipherExecutor:
+
+    def __init__(self, mode="thread", workers=None, queue_depth=64, threshold=64 * 1024):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode {mode!r}, expected one of {', '.join(EXECUTOR_MODES)}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_depth = queue_depth
+        self.threshold = threshold
+        self.in_flight = 0
+        self._pool = None
+
+    @classmethod
+    def from_env(cls):
+        workers = os.getenv("CIPHER_POOL_SIZE")
+        return cls(
+            mode=os.getenv("CIPHER_EXECUTOR", "thread"),
+            workers=int(workers) if workers else None,
+            queue_depth=int(os.getenv("CIPHER_QUEUE_DEPTH", 64)),
+            threshold=int(os.getenv("CIPHER_OFFLOAD_THRESHOLD", 64 * 1024)),
+        )
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cipher")
+        return self._pool
+
+    async def run(self, size, fn, *args):
+        # fn must be a module-level function so process workers can unpickle it
+        if self.mode == "inline" or size < self.threshold:
+            return fn(*args)
+        if self.in_flight >= self.workers + self.queue_depth:
+            raise ExecutorBusy("Cipher workers are busy, retry later")
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), partial(fn, *args))
+        finally:
+            self.in_flight -= 1
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+cipher_executor = CipherExecutor.from_env()
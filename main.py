@@ -1,7 +1,17 @@
+import argparse
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import uvicorn
+import metrics
+from admission import ADMISSION_ENABLED, AdmissionMiddleware, admission
 from api import router
+from cache import response_cache
+from executor import cipher_executor
+from modules.key_schedule import key_schedule_cache
+from modules import parallel
+from utils.alphabet import alphabets
 from modules.Rot_Cryp import ROT32Cipher
 from modules.Vige_Cryp import VigenereCipher
 
@@ -11,6 +21,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Added first so it sits inside CORS: rejections still carry CORS headers
+if ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,8 +33,69 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+metrics.register(metrics.Gauge(
+    "cipher_executor_in_flight",
+    "Cipher jobs currently running or queued on the executor",
+    (),
+    lambda: {(): cipher_executor.in_flight}
+))
+metrics.register(metrics.Gauge(
+    "vigenere_key_cache_lookups_total",
+    "Vigenere key schedule cache lookups by result",
+    ("result",),
+    lambda: {("hit",): key_schedule_cache.hits, ("miss",): key_schedule_cache.misses},
+    kind="counter"
+))
+metrics.register(metrics.Gauge(
+    "response_cache_lookups_total",
+    "Response cache lookups by result",
+    ("result",),
+    lambda: {("hit",): response_cache.hits, ("miss",): response_cache.misses},
+    kind="counter"
+))
+metrics.register(metrics.Gauge(
+    "admission_requests",
+    "Admitted requests running and requests waiting for capacity",
+    ("state",),
+    lambda: {("in_flight",): admission.in_flight, ("queued",): admission.queued}
+))
+metrics.register(metrics.Gauge(
+    "admission_memory_bytes",
+    "Estimated memory held by admitted requests",
+    (),
+    lambda: {(): admission.memory}
+))
+metrics.register(metrics.Gauge(
+    "admission_rejections_total",
+    "Requests rejected by admission control by reason",
+    ("reason",),
+    lambda: {(reason,): count for reason, count in admission.rejected.items()},
+    kind="counter"
+))
+
 app.include_router(router, prefix="/api")
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/admission")
+async def admission_stats():
+    return admission.stats()
+
+@app.on_event("startup")
+def load_alphabets():
+    # Workers compile every configured alphabet before taking traffic
+    alphabets.load()
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    cipher_executor.shutdown()
+    parallel.shutdown()
+
 @app.get("/")
 async def welcome():
     return {
@@ -30,7 +104,23 @@ async def welcome():
             "encrypt_rot32": "/api/encrypt/rot32",
             "decrypt_rot32": "/api/decrypt/rot32",
             "encrypt_vigenere": "/api/encrypt/vigenere",
-            "decrypt_vigenere": "/api/decrypt/vigenere"
+            "decrypt_vigenere": "/api/decrypt/vigenere",
+            "encrypt_rot32_stream": "/api/encrypt/rot32/stream",
+            "decrypt_rot32_stream": "/api/decrypt/rot32/stream",
+            "encrypt_vigenere_stream": "/api/encrypt/vigenere/stream",
+            "decrypt_vigenere_stream": "/api/decrypt/vigenere/stream",
+            "encrypt_rot32_bytes": "/api/encrypt/rot32/bytes",
+            "decrypt_rot32_bytes": "/api/decrypt/rot32/bytes",
+            "encrypt_vigenere_bytes": "/api/encrypt/vigenere/bytes",
+            "decrypt_vigenere_bytes": "/api/decrypt/vigenere/bytes",
+            "batch": "/api/batch",
+            "pipeline": "/api/pipeline",
+            "compact_trace": "/api/trace/{cipher}/{op}",
+            "session": "ws /api/session",
+            "encrypt_edit": "/api/encrypt/{cipher}/edit",
+            "fast": "/api/{encrypt,decrypt}/{cipher}/fast",
+            "metrics": "/metrics",
+            "admission": "/admission"
         }
     }
 
@@ -64,6 +154,53 @@ def run_on_terminal():
     else:
         print("Invalid choice")
 
+# Serving settings: each flag falls back to an env var, then to the default.
+# Workers are separate processes started by uvicorn (spawned, so each one
+# imports the app itself); the parent imports everything first so a bad
+# configuration fails once, before any worker starts.
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Encryption Visualizer API")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--loop", default=os.getenv("UVICORN_LOOP", "auto"), choices=["auto", "asyncio", "uvloop"],
+                        help="event loop; auto uses uvloop when it is installed")
+    parser.add_argument("--http", default=os.getenv("UVICORN_HTTP", "auto"), choices=["auto", "h11", "httptools"],
+                        help="HTTP parser; auto uses httptools when it is installed")
+    parser.add_argument("--backlog", type=int, default=int(os.getenv("SERVER_BACKLOG", 2048)))
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT", 30)),
+                        help="seconds to let in-flight requests finish on shutdown")
+    parser.add_argument("--reload", action="store_true", default=os.getenv("SERVER_RELOAD", "0") == "1",
+                        help="development mode: one process, restart on file changes")
+    parser.add_argument("--terminal", action="store_true", help="run the interactive terminal prompt instead")
+    return parser.parse_args(argv)
+
+def preload():
+    # Build the alphabet tables and warm the cipher paths in the parent
+    for name in alphabets.load():
+        tables = alphabets.get(name)
+        ROT32Cipher(tables).decrypt(ROT32Cipher(tables).encrypt("preload"))
+        VigenereCipher(tables).decrypt(VigenereCipher(tables).encrypt("preload", "key"), "key")
+    return alphabets
+
+def serve(args):
+    preload()
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=1 if args.reload else max(1, args.workers),
+        reload=args.reload,
+        loop=args.loop,
+        http=args.http,
+        backlog=args.backlog,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+
 if __name__ == "__main__":
-    # run_on_terminal()
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    args = parse_args()
+    if args.terminal:
+        run_on_terminal()
+    else:
+        serve(args)
\ No newline at end of file
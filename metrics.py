@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+# Prometheus-style instrumentation. Disabled by default; with METRICS_ENABLED=1
+# the middleware records per-route latency and request sizes, the cipher
+# builders record per-stage timings, and GET /metrics renders everything in
+# the Prometheus text exposition format. When disabled, stage() hands back a
+# shared no-op context manager and the middleware is not installed.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0").lower() in ("1", "true", "yes", "on")
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 256, 1 << 10, 4 << 10, 16 << 10, 64 << 10, 256 << 10, 1 << 20, 4 << 20, 16 << 20, 64 << 20)
+
+_NOOP = nullcontext()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts (non-cumulative), then sum and count
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._series.items())
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total!r}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Gauge:
+    # Sampled at render time from a callback returning {label values: value}
+
+    def __init__(self, name, help, labelnames, callback, kind="gauge"):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self.callback().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+stage_seconds = Histogram(
+    "cipher_stage_seconds",
+    "Time spent in each cipher pipeline stage",
+    ("stage",)
+)
+request_seconds = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route", "status")
+)
+request_bytes = Histogram(
+    "http_request_size_bytes",
+    "HTTP request body size by route",
+    ("route",),
+    SIZE_BUCKETS
+)
+
+# Keyed by metric name: a module imported twice (`python main.py` runs it as
+# __main__ and then as main) registers the same families again, and the
+# later registration replaces the earlier one instead of duplicating it
+REGISTRY = {metric.name: metric for metric in (stage_seconds, request_seconds, request_bytes)}
+
+
+def register(metric):
+    REGISTRY[metric.name] = metric
+    return metric
+
+
+class _Stage:
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        stage_seconds.observe(time.perf_counter() - self.start, self.name)
+        return False
+
+
+def stage(name):
+    # with metrics.stage("vigenere"): ...
+    if not METRICS_ENABLED:
+        return _NOOP
+    return _Stage(name)
+
+
+def observe_parse(request):
+    # Time between the middleware seeing the request and the handler running:
+    # body read, JSON decoding and model validation
+    if METRICS_ENABLED:
+        start = request.scope.get("state", {}).get("metrics_start")
+        if start is not None:
+            stage_seconds.observe(time.perf_counter() - start, "parse")
+
+
+def mark_handled(request):
+    # The handler is done; the middleware times what remains until the
+    # response starts (response model validation and JSON serialization)
+    if METRICS_ENABLED:
+        request.scope.get("state", {})["metrics_handled"] = time.perf_counter()
+
+
+def render():
+    lines = []
+    for metric in REGISTRY.values():
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    # Pure ASGI middleware so streaming responses are timed to their last byte
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        state = scope.setdefault("state", {})
+        state["metrics_start"] = start
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                handled = state.pop("metrics_handled", None)
+                if handled is not None:
+                    stage_seconds.observe(time.perf_counter() - handled, "serialize")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "unmatched"
+            request_seconds.observe(time.perf_counter() - start, scope["method"], route, str(status))
+            for name, value in scope.get("headers", ()):
+                if name == b"content-length":
+                    try:
+                        request_bytes.observe(int(value), route)
+                    except ValueError:
+                        pass
+                    break
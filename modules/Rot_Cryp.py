@@ -1,49 +1,97 @@
+from utils.alphabet import alphabets
 from utils.utils import (
-    ALPHABET,
-    char_to_ascii_bits,
-    ascii_bits_to_char,
-    bits_to_base64,
-    base64_to_bits,
+    text_to_base64,
+    base64_to_text,
+    bytes_to_base64,
+    base64_to_bytes,
     remove_spaces,
-    return_spaces
+    return_spaces,
+    Base64Encoder,
+    Base64Decoder
 )
 
 class ROT32Cipher:
+    # alphabet: an Alphabet from utils.alphabet.alphabets, None for the default
+
+    def __init__(self, alphabet=None):
+        self.alphabet = alphabet
+
+    @staticmethod
+    def _rot_encrypt(b64, alphabet=None):
+        tables = alphabet or alphabets.default
+        tables.validate(b64, allow_padding=True)
+        return b64.translate(tables.rot32_encrypt)
 
     @staticmethod
-    def _rot_encrypt(b64):
-        result = ""
-        for c in b64:
-            if c == '=':
-                result += '='
-            else:
-                idx = ALPHABET.index(c)
-                new_idx = (idx + 32) % 64
-                result += ALPHABET[new_idx]
-        return result
+    def _rot_decrypt(b64, alphabet=None):
+        tables = alphabet or alphabets.default
+        tables.validate(b64, allow_padding=True)
+        return b64.translate(tables.rot32_decrypt)
 
+    # The public methods are fused: Base64 encoding and the rotation happen in
+    # one translate through the alphabet's rot32 tables. _rot_encrypt and
+    # _rot_decrypt are the two-stage reference, kept for the step traces.
     @staticmethod
-    def _rot_decrypt(b64):
-        result = ""
-        for c in b64:
-            if c == '=':
-                result += '='
-            else:
-                idx = ALPHABET.index(c)
-                new_idx = (idx - 32) % 64
-                result += ALPHABET[new_idx]
-        return result
+    def _rotated(alphabet):
+        return (alphabet or alphabets.default).rot32
 
     def encrypt(self, plaintext):
-        # Process: ASCII bits -> Step 2: Group into 6 bits and convert to Base64 -> Step 3: Apply ROT32 rotation
+        # Process: Encode text straight to rotated Base64 symbols
         norm_ = remove_spaces(plaintext)
-        bits = char_to_ascii_bits(norm_)
-        b64 = bits_to_base64(bits)
-        return self._rot_encrypt(b64)
+        return text_to_base64(norm_, self._rotated(self.alphabet))
 
     def decrypt(self, ciphertext):
-        # Apply ROT32 decryption -> Convert Base64 to bits -> Group into 8 bits and convert to text
-        b64 = self._rot_decrypt(ciphertext)
-        bits = base64_to_bits(b64)
-        char = ascii_bits_to_char(bits)
-        return remove_spaces(char)
\ No newline at end of file
+        # Check the symbols -> Decode rotated Base64 straight back to text
+        rotated = self._rotated(self.alphabet)
+        rotated.validate(ciphertext, allow_padding=True)
+        char = base64_to_text(ciphertext, rotated)
+        return remove_spaces(char)
+
+    def encrypt_bytes(self, data):
+        # Binary-safe variant: bytes/memoryview go straight into the codec, no space sentinel
+        return bytes_to_base64(data, self._rotated(self.alphabet))
+
+    def decrypt_bytes(self, ciphertext):
+        if not isinstance(ciphertext, str):
+            ciphertext = bytes(ciphertext).decode("utf-8")
+        rotated = self._rotated(self.alphabet)
+        rotated.validate(ciphertext, allow_padding=True)
+        return base64_to_bytes(ciphertext, rotated)
+
+    def encryptor(self):
+        return ROT32Encryptor(self.alphabet)
+
+    def decryptor(self):
+        return ROT32Decryptor(self.alphabet)
+
+
+class ROT32Encryptor:
+    # Incremental ROT32Cipher.encrypt: feed text through update() and call
+    # finalize() once at the end. Streaming covers characters up to U+00FF.
+    def __init__(self, alphabet=None):
+        self._encoder = Base64Encoder(ROT32Cipher._rotated(alphabet))
+
+    def update(self, chunk):
+        try:
+            data = remove_spaces(chunk).encode("latin-1")
+        except UnicodeEncodeError:
+            raise ValueError("Streamed text is limited to characters up to U+00FF; use the JSON endpoint") from None
+        return self._encoder.update(data)
+
+    def finalize(self):
+        return self._encoder.finalize()
+
+
+class ROT32Decryptor:
+    # Incremental ROT32Cipher.decrypt
+    def __init__(self, alphabet=None):
+        self._rotated = ROT32Cipher._rotated(alphabet)
+        self._decoder = Base64Decoder(self._rotated)
+
+    def update(self, chunk):
+        self._rotated.validate(chunk, allow_padding=True)
+        data = self._decoder.update(chunk)
+        return remove_spaces(data.decode("latin-1"))
+
+    def finalize(self):
+        return remove_spaces(self._decoder.finalize().decode("latin-1"))
@@ -1,54 +1,152 @@
+import os
+from itertools import cycle, islice
+
+from utils.alphabet import alphabets, INDEX_ROTATIONS
 from utils.utils import (
-    ALPHABET,
-    char_to_ascii_bits,
-    ascii_bits_to_char,
-    bits_to_base64,
-    base64_to_bits,
-    repeat_key,
+    text_to_base64,
+    base64_to_text,
+    bytes_to_base64,
+    base64_to_bytes,
     remove_spaces,
-    return_spaces
+    return_spaces,
+    Base64Encoder,
+    Base64Decoder,
+    SpaceRestorer
 )
+from modules import numpy_backend
+from modules.key_schedule import key_schedule_cache
+
+# Strided translate path: one table per key position, applied to every
+# period-th symbol, so the per-character work runs in C. It costs one slice
+# per key symbol, so on inputs large enough for NumPy it only wins for keys
+# up to STRIDE_NUMPY_PERIOD Base64 symbols; otherwise it is used for keys up
+# to STRIDE_MAX_PERIOD symbols. Both this and the NumPy kernel must match
+# _shift_generic, the symbol-by-symbol reference.
+STRIDE_MAX_PERIOD = int(os.getenv("VIGENERE_STRIDE_MAX_PERIOD", 1024))
+STRIDE_NUMPY_PERIOD = 16
 
 class VigenereCipher:
+    # alphabet: an Alphabet from utils.alphabet.alphabets, None for the default
+
+    def __init__(self, alphabet=None):
+        self.alphabet = alphabet
 
     @staticmethod
-    def _encrypt_base64(m, k):
-        result = ""
-        for mc, kc in zip(m, k):
-            mi = ALPHABET.index(mc)
-            ki = ALPHABET.index(kc)
-            result += ALPHABET[(mi + ki) % 64]
-        return result
+    def _key_schedule(key):
+        return key_schedule_cache.get(key)
 
     @staticmethod
-    def _decrypt_base64(c, k):
-        result = ""
-        for cc, kc in zip(c, k):
-            ci = ALPHABET.index(cc)
-            ki = ALPHABET.index(kc)
-            result += ALPHABET[(ci - ki) % 64]
-        return result
+    def _shift(b64, schedule, sign, offset=0, alphabet=None):
+        # Add (sign=1) or subtract (sign=-1) the key schedule, starting at key phase `offset`
+        tables = alphabet or alphabets.default
+        period = schedule.period
+        if numpy_backend.use_numpy(len(b64)) and period > STRIDE_NUMPY_PERIOD:
+            return numpy_backend.vigenere(b64, schedule.indices, sign, offset, tables)
+        if period <= STRIDE_MAX_PERIOD:
+            return VigenereCipher._shift_strided(b64, schedule, sign, offset, tables)
+        return VigenereCipher._shift_generic(b64, schedule, sign, offset, tables)
+
+    @staticmethod
+    def _shift_generic(b64, schedule, sign, offset, tables):
+        # One symbol at a time against the cycled key
+        idx = tables.to_indices(b64)
+        key = islice(cycle(schedule.indices), offset % schedule.period, None)
+        if sign > 0:
+            shifted = bytes((a + b) & 63 for a, b in zip(idx, key))
+        else:
+            shifted = bytes((a - b) & 63 for a, b in zip(idx, key))
+        return tables.from_indices(shifted)
+
+    @staticmethod
+    def _shift_strided(b64, schedule, sign, offset, tables):
+        # Symbols j, j + period, j + 2*period, ... all get the same key
+        # symbol, so each of those strided slices is one translate
+        if tables.is_ascii and b64.isascii():
+            raw = tables.to_ascii(b64)
+            shifts = tables.shift_tables
+        else:
+            # Symbols wider than a byte: rotate their indices instead
+            raw = tables.to_indices(b64)
+            shifts = INDEX_ROTATIONS
+        key = schedule.indices
+        period = schedule.period
+        out = bytearray(len(raw))
+        for j in range(min(period, len(raw))):
+            k = key[(offset + j) % period]
+            out[j::period] = raw[j::period].translate(shifts[k if sign > 0 else -k & 63])
+        if shifts is INDEX_ROTATIONS:
+            return tables.from_indices(out)
+        return out.decode("ascii")
 
     def encrypt(self, plaintext, key):
-        # Convert plaintext to ASCII bits -> Convert plaintext bits to Base64 -> Convert key to ASCII bits -> Convert key bits to Base64 -> Repeat key to match plaintext length -> Apply Vigenere encryption
+        # Encode plaintext to Base64 -> Look up the cached key schedule -> Apply Vigenere encryption with the repeating key
         no_space_plaintext = remove_spaces(plaintext)
-        m_bits = char_to_ascii_bits(no_space_plaintext)
-        m_b64 = bits_to_base64(m_bits)
+        m_b64 = text_to_base64(no_space_plaintext, self.alphabet)
         m_b64 = m_b64.rstrip('=')
-        k_bits = char_to_ascii_bits(key)
-        k_b64 = bits_to_base64(k_bits)
-        k_b64 = k_b64.rstrip('=')
-        k_b64 = repeat_key(k_b64, len(m_b64))
-        return self._encrypt_base64(m_b64, k_b64)
+        return self._shift(m_b64, self._key_schedule(key), 1, 0, self.alphabet)
 
     def decrypt(self, ciphertext, key):
-        # Convert key to ASCII bits -> Convert key bits to Base64 -> Repeat key to match ciphertext length -> Apply Vigenere decryption -> Convert Base64 to bits -> Convert bits to text
-        
-        k_bits = char_to_ascii_bits(key)
-        k_b64 = bits_to_base64(k_bits)
-        k_b64 = k_b64.rstrip('=')
-        k_b64 = repeat_key(k_b64, len(ciphertext))
-        m_b64 = self._decrypt_base64(ciphertext, k_b64)
-        bits = base64_to_bits(m_b64)
-        msg = ascii_bits_to_char(bits)
-        return return_spaces(msg)
\ No newline at end of file
+        # Look up the cached key schedule -> Apply Vigenere decryption with the repeating key -> Decode Base64 back to text
+        m_b64 = self._shift(ciphertext, self._key_schedule(key), -1, 0, self.alphabet)
+        msg = base64_to_text(m_b64, self.alphabet)
+        return return_spaces(msg)
+
+    def encrypt_bytes(self, data, key):
+        # Binary-safe variant: bytes/memoryview go straight into the codec, no space sentinel
+        m_b64 = bytes_to_base64(data, self.alphabet).rstrip('=')
+        return self._shift(m_b64, self._key_schedule(key), 1, 0, self.alphabet)
+
+    def decrypt_bytes(self, ciphertext, key):
+        if not isinstance(ciphertext, str):
+            ciphertext = bytes(ciphertext).decode("utf-8")
+        return base64_to_bytes(self._shift(ciphertext, self._key_schedule(key), -1, 0, self.alphabet), self.alphabet)
+
+    def encryptor(self, key):
+        return VigenereEncryptor(key, self.alphabet)
+
+    def decryptor(self, key):
+        return VigenereDecryptor(key, self.alphabet)
+
+
+class VigenereEncryptor:
+    # Incremental VigenereCipher.encrypt: the key phase is carried across
+    # update() calls. Streaming covers characters up to U+00FF.
+    def __init__(self, key, alphabet=None):
+        self._key = VigenereCipher._key_schedule(key)
+        self._alphabet = alphabet
+        self._encoder = Base64Encoder(alphabet)
+        self._pos = 0
+
+    def _shift(self, b64):
+        result = VigenereCipher._shift(b64, self._key, 1, self._pos, self._alphabet)
+        self._pos += len(b64)
+        return result
+
+    def update(self, chunk):
+        try:
+            data = remove_spaces(chunk).encode("latin-1")
+        except UnicodeEncodeError:
+            raise ValueError("Streamed text is limited to characters up to U+00FF; use the JSON endpoint") from None
+        return self._shift(self._encoder.update(data))
+
+    def finalize(self):
+        return self._shift(self._encoder.finalize().rstrip('='))
+
+
+class VigenereDecryptor:
+    # Incremental VigenereCipher.decrypt
+    def __init__(self, key, alphabet=None):
+        self._key = VigenereCipher._key_schedule(key)
+        self._alphabet = alphabet
+        self._decoder = Base64Decoder(alphabet)
+        self._spaces = SpaceRestorer()
+        self._pos = 0
+
+    def update(self, chunk):
+        m_b64 = VigenereCipher._shift(chunk, self._key, -1, self._pos, self._alphabet)
+        self._pos += len(chunk)
+        return self._spaces.update(self._decoder.update(m_b64).decode("latin-1"))
+
+    def finalize(self):
+        text = self._decoder.finalize().decode("latin-1")
+        return self._spaces.update(text) + self._spaces.finalize()
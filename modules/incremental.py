@@ -0,0 +1,137 @@
+from modules.Rot_Cryp import ROT32Cipher
+from modules.Vige_Cryp import VigenereCipher
+from modules.key_schedule import key_schedule_cache
+from utils.alphabet import alphabets
+from utils.utils import bytes_to_base64, remove_spaces, SPACE_SENTINEL
+
+# Incremental re-encryption of an edited plaintext. Base64 encodes every
+# 3 bytes into 4 symbols on their own, and the Vigenere key phase of a symbol
+# depends only on its position, so an edit changes only the output blocks it
+# touches:
+#
+#   - an edit that keeps the (space-expanded) length recomputes just the
+#     4-symbol blocks covering it
+#   - any other edit moves everything after it, so the output is recomputed
+#     from the block holding the edit point to the end
+#
+# The result is a patch {"start", "end", "text"}: replace output[start:end]
+# with text. Positions before the edit are never re-encoded, so appending to
+# a long document costs the same as appending to a short one.
+#
+# Inputs must match the character-per-byte path of the ciphers (characters
+# up to U+00FF); anything else is re-encrypted in full, as a patch over the
+# whole output. `output` must be the ciphertext of `previous` under the same
+# cipher, key and alphabet; its length, its first block and the block just
+# before the edit are checked against `previous`, and OutputMismatch is
+# raised when they disagree.
+_SPREAD = len(SPACE_SENTINEL) - 1
+
+
+class OutputMismatch(ValueError):
+    pass
+
+
+def _output_length(cipher, n):
+    # Ciphertext length for n space-expanded plaintext bytes: ROT32 output is
+    # padded to whole blocks, Vigenere output is not
+    if cipher == "rot32":
+        return (n + 2) // 3 * 4
+    return (4 * n + 2) // 3
+
+
+def _norm_pos(text, pos, total):
+    # Position of text[pos] after remove_spaces; spaces are counted on the
+    # shorter side of pos, so edits near either end stay cheap
+    if pos <= len(text) - pos:
+        return pos + _SPREAD * text.count(" ", 0, pos)
+    return total - (len(text) - pos) - _SPREAD * text.count(" ", pos)
+
+
+def _is_latin1(text):
+    if text.isascii():
+        return True
+    try:
+        text.encode("latin-1")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _encrypt(cipher, key, tables, text):
+    if cipher == "rot32":
+        return ROT32Cipher(tables).encrypt(text)
+    return VigenereCipher(tables).encrypt(text, key)
+
+
+def _encrypt_blocks(cipher, key, tables, data, block):
+    # Ciphertext of `data`, the plaintext bytes starting at 3-byte block `block`
+    if cipher == "rot32":
+        return bytes_to_base64(data, tables.rot32)
+    b64 = bytes_to_base64(data, tables).rstrip('=')
+    return VigenereCipher._shift(b64, key_schedule_cache.get(key), 1, 4 * block, tables)
+
+
+def _check_output(cipher, key, tables, previous, output, start, norm_start, total):
+    if len(output) != _output_length(cipher, total):
+        raise OutputMismatch(
+            f"output has {len(output)} symbols, but the ciphertext of previous has "
+            f"{_output_length(cipher, total)}; re-encrypt the document in full"
+        )
+    checks = [(0, remove_spaces(previous[:3])[:3])]
+    # The whole blocks holding the two characters before the edit; the
+    # first of them starts at most 2 characters earlier still
+    block = norm_start // 3
+    first = (norm_start - len(remove_spaces(previous[max(0, start - 2):start]))) // 3
+    if first < block:
+        before = remove_spaces(previous[max(0, start - 4):start])
+        checks.append((first, before[len(before) - (norm_start - 3 * first):][:3 * (block - first)]))
+    for index, data in checks:
+        expected = _encrypt_blocks(cipher, key, tables, data.encode("latin-1"), index)
+        if output[4 * index:4 * index + len(expected)] != expected:
+            raise OutputMismatch(
+                "output is not the ciphertext of previous under this cipher, key and alphabet; "
+                "re-encrypt the document in full"
+            )
+
+
+def reencrypt(cipher, previous, output, start, end, text, key=None, alphabet=None):
+    # previous: plaintext `output` was encrypted from; the edit replaces
+    # previous[start:end] with text. alphabet is a configured alphabet name.
+    if cipher not in ("rot32", "vigenere"):
+        raise ValueError(f"Unsupported cipher: {cipher}")
+    if cipher == "vigenere" and not key:
+        raise ValueError("Key is required for Vigenere cipher")
+    if not 0 <= start <= end <= len(previous):
+        raise ValueError(f"Edit range {start}:{end} is outside the previous input (length {len(previous)})")
+    tables = alphabets.get(alphabet)
+
+    if not (_is_latin1(previous) and _is_latin1(text)):
+        edited = previous[:start] + text + previous[end:]
+        return {"start": 0, "end": len(output), "text": _encrypt(cipher, key, tables, edited)}
+
+    total = len(previous) + _SPREAD * previous.count(" ")
+    norm_start = _norm_pos(previous, start, total)
+    _check_output(cipher, key, tables, previous, output, start, norm_start, total)
+    norm_end = _norm_pos(previous, end, total)
+    inserted = remove_spaces(text)
+    block = norm_start // 3
+    # The start of the first block sits at most 2 characters before the edit
+    head = remove_spaces(previous[max(0, start - 2):start])
+    head = head[len(head) - (norm_start - 3 * block):]
+
+    if len(inserted) == norm_end - norm_start:
+        if not inserted:
+            return {"start": 4 * block, "end": 4 * block, "text": ""}
+        # Same length: only the blocks up to the one holding the last edited byte
+        stop = (norm_start + len(inserted) + 2) // 3 * 3
+        tail = remove_spaces(previous[end:end + 2])[:stop - norm_end]
+        data = (head + inserted + tail).encode("latin-1")
+        patch = _encrypt_blocks(cipher, key, tables, data, block)
+        return {"start": 4 * block, "end": min(4 * block + len(patch), len(output)), "text": patch}
+
+    data = (head + inserted + remove_spaces(previous[end:])).encode("latin-1")
+    return {"start": 4 * block, "end": len(output), "text": _encrypt_blocks(cipher, key, tables, data, block)}
+
+
+def apply_patch(output, patch):
+    return output[:patch["start"]] + patch["text"] + output[patch["end"]:]
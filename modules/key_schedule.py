@@ -0,0 +1,83 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from utils.alphabet import alphabets
+from utils.utils import text_to_base64
+
+
+class KeySchedule:
+    # A Vigenere key reduced to the alphabet indices of its Base64 form. The
+    # cipher reads it modulo its period instead of repeating the key string.
+    # The indices are the same under every alphabet, so one schedule serves
+    # all of them.
+    __slots__ = ("indices", "period")
+
+    def __init__(self, indices):
+        self.indices = indices
+        self.period = len(indices)
+
+    @classmethod
+    def from_key(cls, key):
+        k_b64 = text_to_base64(key).rstrip('=')
+        if not k_b64:
+            raise ValueError("Key must not be empty")
+        return cls(alphabets.default.to_indices(k_b64))
+
+    def symbols(self, alphabet=None):
+        return (alphabet or alphabets.default).from_indices(self.indices)
+
+
+class KeyScheduleCache:
+    # LRU of derived key schedules. Entries are looked up by a digest of the
+    # key, so raw keys never sit in the cache's key space. A capacity of 0
+    # disables caching.
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.blake2b(key.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def get(self, key):
+        digest = self._digest(key)
+        with self._lock:
+            schedule = self._entries.get(digest)
+            if schedule is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return schedule
+            self.misses += 1
+
+        schedule = KeySchedule.from_key(key)
+        if self.capacity > 0:
+            with self._lock:
+                self._entries[digest] = schedule
+                self._entries.move_to_end(digest)
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+        return schedule
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+key_schedule_cache = KeyScheduleCache(int(os.getenv("VIGENERE_KEY_CACHE_SIZE", 1024)))
@@ -0,0 +1,45 @@
+import os
+
+from utils.alphabet import alphabets
+
+# NumPy is optional; without it the ciphers keep their pure-Python kernels
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAVE_NUMPY = np is not None
+
+# Base64 symbols below which the pure-Python kernels are faster than the
+# array setup cost
+NUMPY_THRESHOLD = int(os.getenv("CIPHER_NUMPY_THRESHOLD", 4096))
+
+
+def use_numpy(length):
+    return HAVE_NUMPY and length >= NUMPY_THRESHOLD
+
+
+def _to_array(symbols, tables):
+    # Copy, since the kernels below work in place
+    return np.frombuffer(tables.to_indices(symbols), dtype=np.uint8).copy()
+
+
+def vigenere(b64, key_indices, sign, offset=0, alphabet=None):
+    # (m + k) % 64 for sign=1, (c - k) % 64 for sign=-1, with the key starting
+    # at phase `offset`. The key is applied by broadcasting one period over
+    # each row instead of materializing it.
+    tables = alphabet or alphabets.default
+    idx = _to_array(b64, tables)
+    key = np.frombuffer(key_indices, dtype=np.uint8)
+    phase = offset % len(key)
+    if phase:
+        key = np.concatenate((key[phase:], key[:phase]))
+    if sign < 0:
+        key = (64 - key) & 63
+    period = len(key)
+    full = len(idx) - len(idx) % period
+    rows = idx[:full].reshape(-1, period)
+    rows += key
+    idx[full:] += key[:len(idx) - full]
+    idx &= 63
+    return tables.from_indices(idx.tobytes())
@@ -0,0 +1,143 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from modules.Rot_Cryp import ROT32Cipher
+from modules.Vige_Cryp import VigenereCipher
+from modules.key_schedule import key_schedule_cache
+from utils.alphabet import alphabets
+from utils.utils import bytes_to_base64, remove_spaces
+
+# Parallel encryption of one large message. Base64 turns every 3 bytes into
+# 4 symbols on their own and the Vigenere key phase of a symbol is its
+# position, so the input is cut on 3-byte boundaries and each piece is
+# encrypted by a separate process; the output is identical to the serial
+# ciphers. The /api/encrypt/*/bytes routes use it for bodies of
+# PARALLEL_MIN_SIZE and up. The parent process owns both blocks and unlinks them; workers
+# only attach. The input is copied once into a shared memory block and each
+# worker writes its symbols straight into a shared output block at
+# 4 * (start / 3), so neither side is pickled through the pool.
+#
+#   PARALLEL_WORKERS    processes (default: CPU count)
+#   PARALLEL_MIN_SIZE   input bytes below which the serial cipher is used (default 4 MiB)
+#
+# Alphabets with non-ASCII symbols have no fixed byte width per symbol, so
+# their workers return text instead of writing to the output block.
+PARALLEL_WORKERS = int(os.getenv("PARALLEL_WORKERS", 0)) or os.cpu_count() or 1
+PARALLEL_MIN_SIZE = int(os.getenv("PARALLEL_MIN_SIZE", 4 << 20))
+
+_pools = {}
+
+
+def _pool(workers):
+    pool = _pools.get(workers)
+    if pool is None:
+        pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+    return pool
+
+
+def shutdown():
+    for pool in _pools.values():
+        pool.shutdown()
+    _pools.clear()
+
+
+def use_parallel(size, workers=None):
+    return (workers or PARALLEL_WORKERS) > 1 and size >= max(PARALLEL_MIN_SIZE, 1)
+
+
+def _output_size(cipher, n):
+    if cipher == "rot32":
+        return (n + 2) // 3 * 4
+    return (4 * n + 2) // 3
+
+
+def _encrypt_range(cipher, key, alphabet, src, dst, start, stop):
+    # Encrypt bytes [start, stop) of block `src`; symbols go to block `dst` at
+    # 4 * start / 3, or are returned when dst is None
+    tables = alphabets.get(alphabet)
+    shm_in = shared_memory.SharedMemory(name=src)
+    try:
+        data = shm_in.buf[start:stop]
+        try:
+            if cipher == "rot32":
+                symbols = bytes_to_base64(data, tables.rot32)
+            else:
+                b64 = bytes_to_base64(data, tables).rstrip('=')
+                symbols = VigenereCipher._shift(b64, key_schedule_cache.get(key), 1, start // 3 * 4, tables)
+        finally:
+            data.release()
+    finally:
+        shm_in.close()
+    if dst is None:
+        return symbols
+    shm_out = shared_memory.SharedMemory(name=dst)
+    try:
+        offset = start // 3 * 4
+        shm_out.buf[offset:offset + len(symbols)] = symbols.encode("ascii")
+    finally:
+        shm_out.close()
+    return None
+
+
+def _serial(cipher, key, tables, data):
+    if cipher == "rot32":
+        return ROT32Cipher(tables).encrypt_bytes(data)
+    return VigenereCipher(tables).encrypt_bytes(data, key)
+
+
+def encrypt_bytes(cipher, data, key=None, alphabet=None, workers=None, chunk_size=None):
+    # Same output as {ROT32,Vigenere}Cipher.encrypt_bytes; alphabet is a
+    # configured alphabet name
+    if cipher not in ("rot32", "vigenere"):
+        raise ValueError(f"Unsupported cipher: {cipher}")
+    if cipher == "vigenere" and not key:
+        raise ValueError("Key is required for Vigenere cipher")
+    tables = alphabets.get(alphabet)
+    workers = workers or PARALLEL_WORKERS
+    n = len(data)
+    if not use_parallel(n, workers):
+        return _serial(cipher, key, tables, data)
+
+    # A few pieces per worker evens out stragglers; multiples of 3 bytes
+    chunk = chunk_size or -(-n // (4 * workers))
+    chunk = max(3, chunk - chunk % 3)
+    size = _output_size(cipher, n)
+    shm_in = shared_memory.SharedMemory(create=True, size=n)
+    shm_out = shared_memory.SharedMemory(create=True, size=size) if tables.is_ascii else None
+    try:
+        shm_in.buf[:n] = data
+        dst = shm_out.name if shm_out is not None else None
+        pool = _pool(workers)
+        futures = [
+            pool.submit(_encrypt_range, cipher, key, alphabet, shm_in.name, dst, start, min(start + chunk, n))
+            for start in range(0, n, chunk)
+        ]
+        parts = [future.result() for future in futures]
+        if shm_out is None:
+            return "".join(parts)
+        view = shm_out.buf[:size]
+        try:
+            return str(view, "ascii")
+        finally:
+            view.release()
+    finally:
+        shm_in.close()
+        shm_in.unlink()
+        if shm_out is not None:
+            shm_out.close()
+            shm_out.unlink()
+
+
+def encrypt(cipher, plaintext, key=None, alphabet=None, workers=None, chunk_size=None):
+    # Same output as {ROT32,Vigenere}Cipher.encrypt
+    norm = remove_spaces(plaintext)
+    try:
+        data = norm.encode("latin-1")
+    except UnicodeEncodeError:
+        # Code points above U+00FF take the serial bit-string path
+        tables = alphabets.get(alphabet)
+        if cipher == "rot32":
+            return ROT32Cipher(tables).encrypt(plaintext)
+        return VigenereCipher(tables).encrypt(plaintext, key)
+    return encrypt_bytes(cipher, data, key, alphabet, workers, chunk_size)
@@ -0,0 +1,199 @@
+import binascii
+import os
+from math import gcd
+
+from utils.alphabet import STD_ALPHABET, INDEX_ROTATIONS, alphabets
+from utils.utils import (
+    char_to_ascii_bits,
+    bits_to_base64,
+    remove_spaces,
+    return_spaces,
+    _std_symbols_to_bytes
+)
+from modules.key_schedule import key_schedule_cache
+
+# Multi-layer pipelines. Every layer is a stage that permutes Base64 indices
+# (0-63), possibly with a different permutation at each position modulo its
+# period. A chain of stages is folded into one permutation table per phase
+# of the combined period, so the whole chain runs as a single translate pass
+# over the index array; symbols are only produced at the very end. Output is
+# unpadded, like the Vigenere cipher.
+#
+# A chain whose combined period (the lcm of the stage periods) is above
+# PIPELINE_MAX_PERIOD is applied stage by stage over the same index array
+# instead of building that many tables.
+PIPELINE_MAX_PERIOD = int(os.getenv("PIPELINE_MAX_PERIOD", 4096))
+
+# Standard Base64 symbols <-> indices, for going between binascii and the
+# index array without touching the custom alphabet
+_STD_TO_INDEX = bytes(STD_ALPHABET.find(b) % 64 for b in range(256))
+_INDEX_TO_STD = STD_ALPHABET * 4
+
+_IDENTITY = INDEX_ROTATIONS[0]
+
+
+def _inverse(table):
+    inverse = bytearray(64)
+    for i in range(64):
+        inverse[table[i]] = i
+    return bytes(inverse) * 4
+
+
+STAGES = {}
+
+
+def register_stage(name):
+    # @register_stage("name") on a class or factory taking the stage's JSON
+    # parameters as keyword arguments
+    def register(factory):
+        STAGES[name] = factory
+        return factory
+    return register
+
+
+@register_stage("rot")
+class RotStage:
+    # Every symbol moved `shift` positions forward in the alphabet
+
+    def __init__(self, shift=32):
+        self.shift = shift % 64
+        self.period = 1
+
+    def tables(self):
+        return [INDEX_ROTATIONS[self.shift]]
+
+
+@register_stage("rot32")
+def rot32_stage():
+    return RotStage(32)
+
+
+@register_stage("vigenere")
+class VigenereStage:
+    # Position i moved by the i-th symbol of the repeating Base64 key
+
+    def __init__(self, key=None):
+        if not key:
+            raise ValueError("Key is required for Vigenere cipher")
+        self.schedule = key_schedule_cache.get(key)
+        self.period = self.schedule.period
+
+    def tables(self):
+        return [INDEX_ROTATIONS[k] for k in self.schedule.indices]
+
+
+def build_stage(spec):
+    # spec: {"type": name, **params}
+    params = dict(spec)
+    name = params.pop("type", None)
+    factory = STAGES.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown pipeline stage: {name!r}; available: {', '.join(sorted(STAGES))}")
+    try:
+        return factory(**params)
+    except TypeError:
+        raise ValueError(f"Invalid parameters for pipeline stage {name!r}: {sorted(params)}") from None
+
+
+def _apply(idx, tables, offset=0):
+    # out[i] = tables[(offset + i) % period][idx[i]], one strided translate per phase
+    period = len(tables)
+    if period == 1:
+        return idx.translate(tables[0])
+    out = bytearray(len(idx))
+    for j in range(min(period, len(idx))):
+        out[j::period] = idx[j::period].translate(tables[(offset + j) % period])
+    return bytes(out)
+
+
+class Pipeline:
+
+    def __init__(self, stages, alphabet=None):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = list(stages)
+        self.alphabet = alphabet
+        period = 1
+        for stage in self.stages:
+            period = period * stage.period // gcd(period, stage.period)
+        self.period = period
+        self._encrypt = self._decrypt = None
+
+    @classmethod
+    def from_specs(cls, specs, alphabet=None):
+        return cls([build_stage(spec) for spec in specs], alphabet)
+
+    def _compose(self):
+        # One table per phase: the stages applied in order
+        stage_tables = [stage.tables() for stage in self.stages]
+        composed = []
+        for j in range(self.period):
+            table = _IDENTITY
+            for tables in stage_tables:
+                table = table.translate(tables[j % len(tables)])
+            composed.append(table)
+        self._encrypt = composed
+        self._decrypt = [_inverse(table) for table in composed]
+
+    def _run(self, idx, decrypt):
+        if self.period <= PIPELINE_MAX_PERIOD:
+            if self._encrypt is None:
+                self._compose()
+            return _apply(idx, self._decrypt if decrypt else self._encrypt)
+        # Combined period too long to tabulate: one pass per stage
+        stages = reversed(self.stages) if decrypt else self.stages
+        for stage in stages:
+            tables = stage.tables()
+            if decrypt:
+                tables = [_inverse(table) for table in tables]
+            idx = _apply(idx, tables)
+        return idx
+
+    def encrypt_indices(self, idx):
+        return self._run(bytes(idx), False)
+
+    def decrypt_indices(self, idx):
+        return self._run(bytes(idx), True)
+
+    def _data_to_indices(self, data):
+        return binascii.b2a_base64(data, newline=False).rstrip(b"=").translate(_STD_TO_INDEX)
+
+    def _indices_to_data(self, idx):
+        return _std_symbols_to_bytes(idx.translate(_INDEX_TO_STD))
+
+    def _tables(self):
+        return self.alphabet or alphabets.default
+
+    def encrypt_bytes(self, data):
+        tables = self._tables()
+        return tables.from_indices(self.encrypt_indices(self._data_to_indices(data)))
+
+    def decrypt_bytes(self, ciphertext):
+        if not isinstance(ciphertext, str):
+            ciphertext = bytes(ciphertext).decode("utf-8")
+        idx = self._tables().to_indices(ciphertext.rstrip('='))
+        return self._indices_to_data(self.decrypt_indices(idx))
+
+    def encrypt(self, plaintext):
+        # Same text handling as the ciphers: space sentinel, then one byte per
+        # character up to U+00FF
+        norm = remove_spaces(plaintext)
+        tables = self._tables()
+        try:
+            idx = self._data_to_indices(norm.encode("latin-1"))
+        except UnicodeEncodeError:
+            idx = tables.to_indices(bits_to_base64(char_to_ascii_bits(norm), tables).rstrip('='))
+        return tables.from_indices(self.encrypt_indices(idx))
+
+    def decrypt(self, ciphertext):
+        return return_spaces(self.decrypt_bytes(ciphertext).decode("latin-1"))
+
+
+def run_pipeline(op, specs, text, alphabet=None):
+    # Entry point for the API; alphabet is a configured alphabet name
+    pipeline = Pipeline.from_specs(specs, alphabets.get(alphabet))
+    if op == "encrypt":
+        return pipeline.encrypt(text)
+    if op == "decrypt":
+        return pipeline.decrypt(text)
+    raise ValueError(f"Unsupported operation: {op}")
@@ -0,0 +1,62 @@
+import step_trace
+from modules.Rot_Cryp import ROT32Cipher
+from modules.Vige_Cryp import VigenereCipher
+from modules.key_schedule import key_schedule_cache
+from utils.alphabet import alphabets
+from utils.utils import text_to_base64, base64_to_text, remove_spaces, return_spaces
+
+# Per-connection cipher state for the WebSocket endpoint. The cipher, key,
+# alphabet and trace mode are set once; the alphabet tables and the Vigenere
+# key schedule are resolved then and reused for every message, so a message
+# costs only the cipher pass itself.
+SESSION_CIPHERS = ("rot32", "vigenere")
+SESSION_STEPS = step_trace.STEP_MODES + ("compact",)
+
+
+class CipherSession:
+
+    def __init__(self, cipher, key=None, alphabet=None, steps="none"):
+        if cipher not in SESSION_CIPHERS:
+            raise ValueError(f"Unsupported cipher: {cipher}")
+        if steps not in SESSION_STEPS:
+            raise ValueError(f"steps must be one of {', '.join(SESSION_STEPS)}")
+        if not (key is None or isinstance(key, str)):
+            raise ValueError("key must be a string")
+        if not (alphabet is None or isinstance(alphabet, str)):
+            raise ValueError("alphabet must be a string")
+        self.cipher = cipher
+        self.key = key
+        self.alphabet = alphabet
+        self.steps = steps
+        self.tables = alphabets.get(alphabet)
+        self.schedule = None
+        if cipher == "vigenere":
+            if not key:
+                raise ValueError("Key is required for Vigenere cipher")
+            self.schedule = key_schedule_cache.get(key)
+
+    def _encrypt(self, text):
+        if self.cipher == "rot32":
+            return ROT32Cipher(self.tables).encrypt(text)
+        b64 = text_to_base64(remove_spaces(text), self.tables).rstrip('=')
+        return VigenereCipher._shift(b64, self.schedule, 1, 0, self.tables)
+
+    def _decrypt(self, text):
+        if self.cipher == "rot32":
+            return ROT32Cipher(self.tables).decrypt(text)
+        m_b64 = VigenereCipher._shift(text, self.schedule, -1, 0, self.tables)
+        return return_spaces(base64_to_text(m_b64, self.tables))
+
+    def run(self, op, text, offset=0, limit=1024):
+        # -> (result, trace); the trace is None when the session has no trace
+        # mode, and otherwise comes out of the same cipher pass as the result
+        if op not in ("encrypt", "decrypt"):
+            raise ValueError(f"Unsupported operation: {op}")
+        if self.steps == "none":
+            return (self._encrypt(text) if op == "encrypt" else self._decrypt(text)), None
+        if self.steps == "compact":
+            return step_trace.compact_trace(self.cipher, op, text, self.key, offset, limit, self.alphabet)
+        builder = getattr(step_trace, f"{self.cipher}_{op}")
+        if self.cipher == "rot32":
+            return builder(text, self.steps, self.alphabet)
+        return builder(text, self.key, self.steps, self.alphabet)
@@ -0,0 +1,408 @@
+import os
+from itertools import islice
+
+import metrics
+from modules.Rot_Cryp import ROT32Cipher
+from modules.Vige_Cryp import VigenereCipher
+from utils.alphabet import alphabets
+from utils.utils import (
+    char_to_ascii_bits,
+    base64_to_bits,
+    text_to_base64,
+    base64_to_text,
+    bytes_to_base64,
+    repeat_key,
+    remove_spaces,
+    return_spaces,
+    SPACE_SENTINEL
+)
+
+# Transformation traces for the visualization endpoints. Each builder runs the
+# cipher stages once and derives the result and the trace from the same
+# intermediates:
+#   none    - result only, no trace work at all
+#   summary - one step per stage with a clipped headline value
+#   full    - every step with per-character details, capped at
+#             TRACE_MAX_ITEMS groups/lines per step for large inputs
+# `alphabet` names one of the configured alphabets (None for the default);
+# names rather than tables are passed so builders stay cheap to ship to a
+# process pool.
+STEP_MODES = ("none", "summary", "full")
+
+TRACE_MAX_ITEMS = int(os.getenv("TRACE_MAX_ITEMS", 4096))
+SUMMARY_ITEMS = 16
+SUMMARY_CHARS = 128
+
+
+def _bit_length(text):
+    try:
+        return 8 * len(text.encode("latin-1"))
+    except UnicodeEncodeError:
+        return len(char_to_ascii_bits(text))
+
+
+def _bits_prefix(text, nbits):
+    # Leading nbits of char_to_ascii_bits(text) without converting the whole text
+    return char_to_ascii_bits(text[:nbits // 8 + 1])[:nbits]
+
+
+class _Trace:
+
+    def __init__(self, mode):
+        self.full = mode == "full"
+        self.limit = TRACE_MAX_ITEMS if self.full else SUMMARY_ITEMS
+        self.steps = []
+
+    def add(self, step, data, description):
+        self.steps.append({"step": step, "data": data, "description": description})
+
+    def clip(self, text):
+        # Headline values: SUMMARY_CHARS characters in summary mode,
+        # TRACE_MAX_ITEMS in full mode
+        size = TRACE_MAX_ITEMS if self.full else SUMMARY_CHARS
+        if len(text) <= size:
+            return text
+        return f"{text[:size]}... ({len(text)} characters)"
+
+    def groups(self, bits, size, total):
+        # ' '-joined `size`-bit groups; `bits` is a prefix of a bit string
+        # holding `total` groups
+        shown = min(total, self.limit)
+        text = ' '.join(bits[i:i + size] for i in range(0, shown * size, size))
+        if total > shown:
+            text += f" ... {total - shown} more"
+        return text
+
+    def lines(self, lines, total):
+        # Newline-terminated detail lines, capped at the trace limit
+        text = ''.join(islice(lines, self.limit))
+        if total > self.limit:
+            text += f"... {total - self.limit} more\n"
+        return text
+
+
+def _ascii_bits(t, text):
+    return t.groups(_bits_prefix(text, t.limit * 8), 8, -(-_bit_length(text) // 8))
+
+
+def _base64_forms(t, b64_full):
+    return f"Full Base64 (with padding): {t.clip(b64_full)}\nBase64 (padding removed): {t.clip(b64_full.rstrip('='))}"
+
+
+def _repeated_key(t, k_b64, length):
+    shown = min(length, t.limit) if t.full else min(length, SUMMARY_CHARS)
+    text = repeat_key(k_b64, shown)
+    if length > shown:
+        text += f"... ({length} characters)"
+    return text
+
+
+def rot32_encrypt(plaintext, mode, alphabet=None):
+    tables = alphabets.get(alphabet)
+    with metrics.stage("rot32"):
+        # ROT32Cipher.encrypt on the already expanded text: straight to
+        # rotated symbols, without a second remove_spaces
+        norm = remove_spaces(plaintext)
+        result = text_to_base64(norm, tables.rot32)
+    if mode == "none":
+        return result, []
+    with metrics.stage("trace"):
+        return result, _rot32_encrypt_steps(mode, tables, plaintext, norm, result)
+
+
+def _rot32_encrypt_steps(mode, tables, plaintext, norm, result):
+    # The fused cipher never builds the unrotated Base64; the trace derives it
+    b64 = result.translate(tables.rot32_decrypt)
+    t = _Trace(mode)
+    t.add("original text", t.clip(plaintext), "Original plaintext input")
+
+    t.add("ASCII bits (8-bit groups)", _ascii_bits(t, norm), "Each character converted to 8-bit ASCII")
+
+    total_bits = _bit_length(norm)
+    padding_needed = (6 - total_bits % 6) % 6
+    total_groups = (total_bits + padding_needed) // 6
+    bits = _bits_prefix(norm, t.limit * 6)
+    if len(bits) == total_bits:
+        bits += '0' * padding_needed
+    t.add(
+        "6-bit groups",
+        t.groups(bits, 6, total_groups),
+        f"Bits grouped into 6-bit chunks (added {padding_needed} padding bits)"
+    )
+
+    if t.full:
+        mapping = (
+            f"Group {i+1}: {bits[i*6:i*6+6]} → '{char}' (index {tables.index[char]})\n"
+            for i, char in enumerate(b64[:min(t.limit, total_groups)])
+        )
+        data = f"Base64: {t.clip(b64)}\n\nMapping:\n{t.lines(mapping, total_groups)}"
+    else:
+        data = f"Base64: {t.clip(b64)}"
+    t.add("Base64 encoding", data, "Each 6-bit group mapped to Base64 character")
+
+    if t.full:
+        rotation = (
+            f"'{o}' (index {tables.index[o]:2d}) → +32 → '{n}' (index {tables.index[n]:2d})\n"
+            if o != '=' else f"'{o}' (padding) → '{n}'\n"
+            for o, n in zip(b64, result)
+        )
+        data = f"Ciphertext: {t.clip(result)}\n\nRotation details:\n{t.lines(rotation, len(b64))}"
+    else:
+        data = f"Ciphertext: {t.clip(result)}"
+    t.add("ROT32 rotation", data, "Each Base64 character rotated by 32 positions")
+    return t.steps
+
+
+def rot32_decrypt(ciphertext, mode, alphabet=None):
+    tables = alphabets.get(alphabet)
+    with metrics.stage("rot32"):
+        result = ROT32Cipher(tables).decrypt(ciphertext)
+    if mode == "none":
+        return result, []
+    with metrics.stage("trace"):
+        return result, _rot32_decrypt_steps(mode, tables, ciphertext, result)
+
+
+def _rot32_decrypt_steps(mode, tables, ciphertext, result):
+    b64 = ROT32Cipher._rot_decrypt(ciphertext, tables)
+    t = _Trace(mode)
+    t.add("ciphertext input", t.clip(ciphertext), "Received encrypted text")
+
+    if t.full:
+        rotation = (
+            f"'{c}' (index {tables.index[c]:2d}) → -32 → '{m}' (index {tables.index[m]:2d})\n"
+            if c != '=' else f"'{c}' (padding) → '{m}'\n"
+            for c, m in zip(ciphertext, b64)
+        )
+        data = f"Base64: {t.clip(b64)}\n\nRotation details:\n{t.lines(rotation, len(ciphertext))}"
+    else:
+        data = f"Base64: {t.clip(b64)}"
+    t.add("ROT32 decryption", data, "Applied ROT32 decryption to get Base64")
+
+    body = b64.rstrip('=')
+    total_bits = 6 * (len(body) - len(tables.invalid_chars(body)))
+    bits = base64_to_bits(body[:t.limit * 8 // 6 + 1], tables)
+    if t.full:
+        debug_bits = bits[:t.limit * 6]
+        if total_bits > len(debug_bits):
+            debug_bits += f" ... {total_bits - len(debug_bits)} more bits"
+        t.add("DEBUG - raw bits from base64_to_bits", debug_bits, "Raw bits output from base64_to_bits()")
+    t.add("6-bit groups from Base64", t.groups(bits, 6, total_bits // 6), "Base64 decoded back to 6-bit groups")
+    t.add(
+        "8-bit ASCII groups",
+        t.groups(bits, 8, total_bits // 8),
+        "6-bit groups recombined into 8-bit ASCII groups"
+    )
+    t.add("ASCII to text", t.clip(result), "8-bit groups converted back to characters")
+    return t.steps
+
+
+def vigenere_encrypt(plaintext, key, mode, alphabet=None):
+    tables = alphabets.get(alphabet)
+    with metrics.stage("base64_encode"):
+        norm = remove_spaces(plaintext)
+        m_b64_full = text_to_base64(norm, tables)
+        m_b64 = m_b64_full.rstrip('=')
+    with metrics.stage("key_schedule"):
+        schedule = VigenereCipher._key_schedule(key)
+    with metrics.stage("vigenere"):
+        result = VigenereCipher._shift(m_b64, schedule, 1, 0, tables)
+    if mode == "none":
+        return result, []
+    with metrics.stage("trace"):
+        return result, _vigenere_encrypt_steps(mode, tables, plaintext, key, norm, m_b64_full, schedule, result)
+
+
+def _vigenere_encrypt_steps(mode, tables, plaintext, key, norm, m_b64_full, schedule, result):
+    t = _Trace(mode)
+    m_b64 = m_b64_full.rstrip('=')
+    k_b64 = schedule.symbols(tables)
+    t.add(
+        "original input",
+        f"Plaintext: {t.clip(plaintext)}\nKey: {t.clip(key)}",
+        "Original input with encryption key"
+    )
+    t.add("plaintext ASCII bits", _ascii_bits(t, norm), "Plaintext converted to 8-bit ASCII")
+    t.add("key ASCII bits", _ascii_bits(t, key), "Key converted to 8-bit ASCII")
+    t.add("plaintext Base64", _base64_forms(t, m_b64_full), "Plaintext converted to Base64")
+    t.add("key Base64", _base64_forms(t, text_to_base64(key, tables)), "Key converted to Base64")
+    t.add(
+        "key repetition",
+        f"Original key Base64: {t.clip(k_b64)}\nRepeated key: {_repeated_key(t, k_b64, len(m_b64))}",
+        f"Key repeated to match plaintext length ({len(m_b64)} characters)"
+    )
+
+    if t.full:
+        index = tables.index
+        period = len(k_b64)
+        addition = (
+            f"'{m}' (idx {index[m]:2d}) + '{k_b64[i % period]}' (idx {index[k_b64[i % period]]:2d}) "
+            f"= {index[m] + index[k_b64[i % period]]:3d} mod 64 = {index[c]:2d} → '{c}'\n"
+            for i, (m, c) in enumerate(zip(m_b64, result))
+        )
+        data = f"Calculation:\n{t.lines(addition, len(m_b64))}\nResult: {t.clip(result)}"
+    else:
+        data = f"Result: {t.clip(result)}"
+    t.add("Vigenere addition", data, "Character-wise addition modulo 64")
+    return t.steps
+
+
+def vigenere_decrypt(ciphertext, key, mode, alphabet=None):
+    tables = alphabets.get(alphabet)
+    with metrics.stage("key_schedule"):
+        schedule = VigenereCipher._key_schedule(key)
+    with metrics.stage("vigenere"):
+        m_b64 = VigenereCipher._shift(ciphertext, schedule, -1, 0, tables)
+    with metrics.stage("base64_decode"):
+        result = return_spaces(base64_to_text(m_b64, tables))
+    if mode == "none":
+        return result, []
+    with metrics.stage("trace"):
+        return result, _vigenere_decrypt_steps(mode, tables, ciphertext, key, schedule, m_b64, result)
+
+
+def _vigenere_decrypt_steps(mode, tables, ciphertext, key, schedule, m_b64, result):
+    t = _Trace(mode)
+    k_b64 = schedule.symbols(tables)
+    t.add(
+        "ciphertext input",
+        f"Ciphertext: {t.clip(ciphertext)}\nKey: {t.clip(key)}",
+        "Received encrypted text with decryption key"
+    )
+    t.add("key ASCII bits", _ascii_bits(t, key), "Key converted to 8-bit ASCII")
+    t.add("key Base64", _base64_forms(t, text_to_base64(key, tables)), "Key converted to Base64")
+    t.add(
+        "key repetition",
+        f"Original key Base64: {t.clip(k_b64)}\nRepeated key: {_repeated_key(t, k_b64, len(ciphertext))}",
+        f"Key repeated to match ciphertext length ({len(ciphertext)} characters)"
+    )
+
+    if t.full:
+        index = tables.index
+        period = len(k_b64)
+        subtraction = (
+            f"'{c}' (idx {index[c]:2d}) - '{k_b64[i % period]}' (idx {index[k_b64[i % period]]:2d}) "
+            f"= {index[c] - index[k_b64[i % period]]:3d} mod 64 = {index[m]:2d} → '{m}'\n"
+            for i, (c, m) in enumerate(zip(ciphertext, m_b64))
+        )
+        data = f"Calculation:\n{t.lines(subtraction, len(ciphertext))}\nResult Base64: {t.clip(m_b64)}"
+    else:
+        data = f"Result Base64: {t.clip(m_b64)}"
+    t.add("Vigenere subtraction", data, "Character-wise subtraction modulo 64")
+
+    body = m_b64.rstrip('=')
+    total_bits = 6 * len(body)
+    bits = base64_to_bits(body[:t.limit * 8 // 6 + 1], tables)
+    t.add("6-bit groups", t.groups(bits, 6, total_bits // 6), "Base64 decoded to 6-bit groups")
+    t.add(
+        "8-bit ASCII groups",
+        t.groups(bits, 8, total_bits // 8),
+        "6-bit groups recombined into 8-bit ASCII groups"
+    )
+    t.add("ASCII to text", t.clip(result), "8-bit groups converted back to characters")
+    return t.steps
+
+
+# Compact traces: instead of formatted text, the cipher's core step as
+# parallel arrays over a window [offset, offset + limit) of Base64 positions.
+# Only the window is materialized, so a viewer can page through a large
+# message without the server formatting a line per character.
+#
+#   input   - Base64 symbols going into the rotation/shift, and their indices
+#   key     - key symbol and index applied at each position (Vigenere only)
+#   output  - resulting symbols and indices
+COMPACT_OPS = ("rot32/encrypt", "rot32/decrypt", "vigenere/encrypt", "vigenere/decrypt")
+
+
+def _arrays(tables, symbols):
+    return {"symbols": symbols, "indices": list(tables.to_indices(symbols))}
+
+
+def _plain_window(text, start, stop, tables):
+    # Base64 symbols [start, stop) of the (unpadded) encoding of the
+    # space-expanded text, and the encoding's length, from only the 3-byte
+    # blocks under the window. None when the text has characters above U+00FF,
+    # whose bit-string encoding does not line up with byte blocks.
+    if not text.isascii():
+        try:
+            text.encode("latin-1")
+        except UnicodeEncodeError:
+            return None
+    n = len(text) + (len(SPACE_SENTINEL) - 1) * text.count(" ")
+    length = (4 * n + 2) // 3
+    stop = min(stop, length)
+    if start >= stop:
+        return "", length
+    first, last = start // 4, -(-stop // 4)
+    # Expansion only lengthens text, so its first 3 * last characters cover
+    # the blocks needed
+    data = remove_spaces(text[:3 * last])[3 * first:3 * last].encode("latin-1")
+    b64 = bytes_to_base64(data, tables)
+    return b64[start - 4 * first:stop - 4 * first], length
+
+
+def _run(cipher, op, text, key, tables):
+    if cipher == "rot32":
+        cipher_obj = ROT32Cipher(tables)
+        return cipher_obj.encrypt(text) if op == "encrypt" else cipher_obj.decrypt(text)
+    cipher_obj = VigenereCipher(tables)
+    return cipher_obj.encrypt(text, key) if op == "encrypt" else cipher_obj.decrypt(text, key)
+
+
+def compact_trace(cipher, op, text, key=None, offset=0, limit=1024, alphabet=None, with_result=True):
+    # -> (result or None, trace). Without with_result only the window is
+    # computed, so paging through a message costs one window per page.
+    if f"{cipher}/{op}" not in COMPACT_OPS:
+        raise ValueError(f"Unsupported operation: {op} {cipher}")
+    offset = max(0, offset)
+    limit = max(0, min(limit, TRACE_MAX_ITEMS))
+    tables = alphabets.get(alphabet)
+    window = slice(offset, offset + limit)
+    schedule = None
+    if cipher == "vigenere":
+        if not key:
+            raise ValueError("Key is required for Vigenere cipher")
+        schedule = VigenereCipher._key_schedule(key)
+
+    result = None
+    with metrics.stage(cipher):
+        if with_result:
+            result = _run(cipher, op, text, key, tables)
+
+        if op == "encrypt":
+            plain = _plain_window(text, offset, offset + limit, tables)
+            if plain is None:
+                # Wide characters: take the window from the full ciphertext
+                body = (result if result is not None else _run(cipher, op, text, key, tables)).rstrip('=')
+                out_symbols = body[window]
+                in_symbols = (ROT32Cipher._rot_decrypt(out_symbols, tables) if schedule is None
+                              else VigenereCipher._shift(out_symbols, schedule, -1, offset, tables))
+                length = len(body)
+            else:
+                in_symbols, length = plain
+                out_symbols = (ROT32Cipher._rot_encrypt(in_symbols, tables) if schedule is None
+                               else VigenereCipher._shift(in_symbols, schedule, 1, offset, tables))
+        else:
+            body = text.rstrip('=') if schedule is None else text
+            in_symbols = body[window]
+            out_symbols = (ROT32Cipher._rot_decrypt(in_symbols, tables) if schedule is None
+                           else VigenereCipher._shift(in_symbols, schedule, -1, offset, tables))
+            length = len(body)
+
+    with metrics.stage("trace"):
+        trace = {
+            "length": length,
+            "offset": offset,
+            "limit": limit,
+            "input": _arrays(tables, in_symbols),
+            "output": _arrays(tables, out_symbols),
+        }
+        if schedule is not None:
+            period = schedule.period
+            key_indices = [schedule.indices[(offset + i) % period] for i in range(len(in_symbols))]
+            trace["key"] = {
+                "symbols": tables.from_indices(bytes(key_indices)),
+                "indices": key_indices,
+                "period": period,
+            }
+    return result, trace
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# The modules live at the repository root and read their alphabets from the
+# environment on first use; these are set before any of them is imported.
+# Worker processes started by modules.parallel inherit them.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ALPHABET_TABLE", "QWERTYUIOPASDFGHJKLZXCVBNMqwertyuiopasdfghjklzxcvbnm0987654321+/")
+os.environ.setdefault("ALPHABET_TABLE_NA", "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzäöüß456789+/")
+
+# Default alphabet (ASCII symbols) and "na" (symbols wider than a byte)
+ALPHABETS = (None, "na")
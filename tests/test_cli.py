@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+import cli
+from conftest import ALPHABETS
+from modules.Rot_Cryp import ROT32Cipher
+from modules.Vige_Cryp import VigenereCipher
+from utils.alphabet import alphabets
+
+KEY = "cli key"
+
+
+def _run(tmp_path, op, cipher, alphabet, data, *extra):
+    src, dst = tmp_path / f"{op}.in", tmp_path / f"{op}.out"
+    src.write_bytes(data)
+    argv = [op, cipher, str(src), "-o", str(dst), "--key", KEY, "--chunk-size", "12", "--workers", "1", "-q", *extra]
+    if alphabet:
+        argv += ["--alphabet", alphabet]
+    assert cli.main(argv) == 0
+    return dst.read_bytes()
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+@pytest.mark.parametrize("cipher", ("rot32", "vigenere"))
+@pytest.mark.parametrize("chars", ("ab cd\xe9\xff", "ab cd\xe9\xff€😀"))
+def test_text_mode_matches_ciphers(tmp_path, cipher, alphabet, chars):
+    # 12-byte chunks cut through multi-byte UTF-8 sequences, space sentinels
+    # and, past the first character above U+00FF, the bit-string path
+    tables = alphabets.get(alphabet)
+    engine = ROT32Cipher(tables) if cipher == "rot32" else VigenereCipher(tables)
+    args = () if cipher == "rot32" else (KEY,)
+    rng = random.Random(chars)
+    for length in (0, 1, 5, 40, 301):
+        text = "".join(rng.choice(chars) for _ in range(length))
+        expected = engine.encrypt(text, *args)
+        assert _run(tmp_path, "encrypt", cipher, alphabet, text.encode("utf-8"), "--text").decode("utf-8") == expected
+        if text.isascii() or max(text) <= "\xff":
+            back = _run(tmp_path, "decrypt", cipher, alphabet, expected.encode("utf-8"), "--text")
+            assert back.decode("utf-8") == engine.decrypt(expected, *args)
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from conftest import ALPHABETS
+from utils.alphabet import alphabets
+from utils.utils import (
+    ascii_bits_to_char,
+    base64_to_bits,
+    base64_to_bytes,
+    base64_to_text,
+    bits_to_base64,
+    bits_to_bytes,
+    bytes_to_base64,
+    bytes_to_bits,
+    char_to_ascii_bits,
+    text_to_base64,
+)
+
+# The table-driven codec against the bit-string helpers it replaced
+
+LENGTHS = list(range(0, 13)) + [63, 64, 65, 1000]
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+@pytest.mark.parametrize("length", LENGTHS)
+def test_encode_matches_bit_strings(alphabet, length):
+    tables = alphabets.get(alphabet)
+    rng = random.Random(length)
+    data = rng.randbytes(length)
+    assert bytes_to_base64(data, tables) == bits_to_base64(bytes_to_bits(data), tables)
+    text = data.decode("latin-1")
+    assert text_to_base64(text, tables) == bits_to_base64(char_to_ascii_bits(text), tables)
+    # Code points above U+00FF keep going through the bit-string path
+    wide = text + "€"
+    assert text_to_base64(wide, tables) == bits_to_base64(char_to_ascii_bits(wide), tables)
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+@pytest.mark.parametrize("length", LENGTHS)
+def test_decode_matches_bit_strings(alphabet, length):
+    tables = alphabets.get(alphabet)
+    rng = random.Random(length)
+    # Any symbol count, including a lone trailing symbol, with and without padding
+    b64 = "".join(rng.choice(tables.chars) for _ in range(length))
+    for symbols in (b64, b64 + "=" * (-len(b64) % 4)):
+        bits = base64_to_bits(symbols, tables)
+        whole = bits[:len(bits) - len(bits) % 8]
+        assert base64_to_bytes(symbols, tables) == bits_to_bytes(whole)
+        assert base64_to_text(symbols, tables) == ascii_bits_to_char(bits)
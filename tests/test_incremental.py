@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from conftest import ALPHABETS
+from modules.Rot_Cryp import ROT32Cipher
+from modules.Vige_Cryp import VigenereCipher
+from modules.incremental import OutputMismatch, apply_patch, reencrypt
+from utils.alphabet import alphabets
+
+KEY = "incremental key"
+
+
+def _encrypt(cipher, text, alphabet):
+    tables = alphabets.get(alphabet)
+    if cipher == "rot32":
+        return ROT32Cipher(tables).encrypt(text)
+    return VigenereCipher(tables).encrypt(text, KEY)
+
+
+def _check(cipher, alphabet, previous, start, end, text):
+    output = _encrypt(cipher, previous, alphabet)
+    patch = reencrypt(cipher, previous, output, start, end, text, KEY, alphabet)
+    edited = previous[:start] + text + previous[end:]
+    assert apply_patch(output, patch) == _encrypt(cipher, edited, alphabet)
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+@pytest.mark.parametrize("cipher", ("rot32", "vigenere"))
+def test_random_edits_match_full_encrypt(cipher, alphabet):
+    rng = random.Random(f"{cipher}-{alphabet}")
+    # Spaces grow to the sentinel, so edits shift the Base64 blocks unevenly
+    chars = "abcxyz  \t\n\xe9\xfc"
+    for _ in range(300):
+        previous = "".join(rng.choice(chars) for _ in range(rng.randrange(0, 40)))
+        start = rng.randrange(0, len(previous) + 1)
+        end = rng.randrange(start, len(previous) + 1)
+        if rng.random() < 0.5:
+            # Same length, the blocks-in-place path
+            text = "".join(rng.choice(chars) for _ in range(end - start))
+        else:
+            text = "".join(rng.choice(chars) for _ in range(rng.randrange(0, 8)))
+        _check(cipher, alphabet, previous, start, end, text)
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+@pytest.mark.parametrize("cipher", ("rot32", "vigenere"))
+@pytest.mark.parametrize("previous, start, end, text", [
+    ("", 0, 0, "hello world"),
+    ("hello world", 11, 11, " again"),
+    ("hello world", 0, 0, "oh "),
+    ("hello world", 0, 11, ""),
+    ("hello world", 5, 6, "_"),
+    ("hello world", 5, 6, "  "),
+    ("hello world", 4, 7, "o€w"),
+    ("naïve café", 2, 3, "ā"),
+])
+def test_edges_match_full_encrypt(cipher, alphabet, previous, start, end, text):
+    _check(cipher, alphabet, previous, start, end, text)
+
+
+def test_range_outside_previous():
+    output = _encrypt("rot32", "abc", None)
+    with pytest.raises(ValueError):
+        reencrypt("rot32", "abc", output, 2, 5, "x")
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+@pytest.mark.parametrize("cipher", ("rot32", "vigenere"))
+def test_mismatched_output_is_rejected(cipher, alphabet):
+    previous = "the quick brown fox jumps over the lazy dog"
+    output = _encrypt(cipher, previous, alphabet)
+    stale = [
+        output[:-4],
+        output + output[:4],
+        _encrypt(cipher, previous.replace("the", "THE", 1), alphabet),
+        _encrypt(cipher, previous.replace("lazy", "LAZY"), alphabet),
+        _encrypt(cipher, previous, "na" if alphabet is None else None),
+    ]
+    if cipher == "vigenere":
+        stale.append(VigenereCipher(alphabets.get(alphabet)).encrypt(previous, "another key"))
+    for wrong in stale:
+        with pytest.raises(OutputMismatch):
+            reencrypt(cipher, previous, wrong, 40, 40, "!", KEY, alphabet)
+
+
+def test_edit_route_answers_409_on_mismatch():
+    from fastapi.testclient import TestClient
+    from main import app
+    previous = "hello world"
+    body = {"previous": previous, "output": _encrypt("vigenere", previous + "!", None),
+            "start": 5, "end": 5, "text": ",", "key": KEY}
+    assert TestClient(app).post("/api/encrypt/vigenere/edit", json=body).status_code == 409
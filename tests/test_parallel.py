@@ -0,0 +1,68 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import ALPHABETS
+from modules import parallel
+from modules.Rot_Cryp import ROT32Cipher
+from modules.Vige_Cryp import VigenereCipher
+from utils.alphabet import alphabets
+
+KEY = "parallel key"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _pools():
+    yield
+    parallel.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def _small_inputs(monkeypatch):
+    # Send even tiny inputs through the worker pool
+    monkeypatch.setattr(parallel, "PARALLEL_MIN_SIZE", 1)
+
+
+def _serial(cipher, data, alphabet):
+    tables = alphabets.get(alphabet)
+    if cipher == "rot32":
+        return ROT32Cipher(tables).encrypt_bytes(data)
+    return VigenereCipher(tables).encrypt_bytes(data, KEY)
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+@pytest.mark.parametrize("cipher", ("rot32", "vigenere"))
+@pytest.mark.parametrize("size", (1, 2, 3, 4, 5, 6, 7, 100, 1001))
+@pytest.mark.parametrize("chunk_size", (3, 5, 64))
+def test_encrypt_bytes_matches_serial(cipher, alphabet, size, chunk_size):
+    data = random.Random(size).randbytes(size)
+    result = parallel.encrypt_bytes(cipher, data, KEY, alphabet, workers=2, chunk_size=chunk_size)
+    assert result == _serial(cipher, data, alphabet)
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+@pytest.mark.parametrize("cipher", ("rot32", "vigenere"))
+@pytest.mark.parametrize("text", ("", "hello world", "naïve café " * 20, "non-Latin-1 € text"))
+def test_encrypt_matches_serial(cipher, alphabet, text):
+    tables = alphabets.get(alphabet)
+    if cipher == "rot32":
+        expected = ROT32Cipher(tables).encrypt(text)
+    else:
+        expected = VigenereCipher(tables).encrypt(text, KEY)
+    assert parallel.encrypt(cipher, text, KEY, alphabet, workers=2, chunk_size=6) == expected
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+@pytest.mark.parametrize("cipher", ("rot32", "vigenere"))
+def test_bytes_route_uses_pool(monkeypatch, cipher, alphabet):
+    from main import app
+    monkeypatch.setattr(parallel, "PARALLEL_WORKERS", 2)
+    calls = []
+    monkeypatch.setattr(parallel, "_pool", lambda workers, pool=parallel._pool: calls.append(workers) or pool(workers))
+    data = random.Random(7).randbytes(1000)
+    params = {} if alphabet is None else {"alphabet": alphabet}
+    r = TestClient(app).post(f"/api/encrypt/{cipher}/bytes", content=data, params=params, headers={"X-Cipher-Key": KEY})
+    assert r.status_code == 200
+    assert r.text == _serial(cipher, data, alphabet)
+    assert calls == [2]
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from conftest import ALPHABETS
+from modules import pipeline
+from modules.Rot_Cryp import ROT32Cipher
+from modules.Vige_Cryp import VigenereCipher
+from modules.pipeline import run_pipeline
+from utils.alphabet import alphabets
+
+# A one-pass pipeline against the same layers applied one call at a time
+
+KEY = "pipeline key"
+STAGES = [{"type": "rot32"}, {"type": "vigenere", "key": KEY}, {"type": "rot", "shift": 5}]
+
+
+def _rot(symbols, shift, tables):
+    return tables.from_indices(bytes((i + shift) & 63 for i in tables.to_indices(symbols)))
+
+
+def _chained(text, tables):
+    b64 = ROT32Cipher(tables).encrypt(text).rstrip("=")
+    b64 = VigenereCipher._shift(b64, VigenereCipher._key_schedule(KEY), 1, 0, tables)
+    return _rot(b64, 5, tables)
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+@pytest.mark.parametrize("max_period", (4096, 0))
+def test_chain_matches_chained_calls(monkeypatch, alphabet, max_period):
+    # max_period 0 runs the chain stage by stage instead of composed
+    monkeypatch.setattr(pipeline, "PIPELINE_MAX_PERIOD", max_period)
+    tables = alphabets.get(alphabet)
+    rng = random.Random(alphabet)
+    for length in list(range(0, 8)) + [100, 1001]:
+        text = "".join(rng.choice("ab cd\xe9\xff€") for _ in range(length))
+        ciphertext = run_pipeline("encrypt", STAGES, text, alphabet)
+        assert ciphertext == _chained(text, tables)
+        if "€" not in text:
+            assert run_pipeline("decrypt", STAGES, ciphertext, alphabet) == text
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+def test_single_stages_match_ciphers(alphabet):
+    tables = alphabets.get(alphabet)
+    text = "hello pipeline world \xe9"
+    assert run_pipeline("encrypt", [{"type": "rot32"}], text, alphabet) == ROT32Cipher(tables).encrypt(text).rstrip("=")
+    vigenere = VigenereCipher(tables).encrypt(text, KEY)
+    assert run_pipeline("encrypt", [{"type": "vigenere", "key": KEY}], text, alphabet) == vigenere
+    assert run_pipeline("decrypt", [{"type": "vigenere", "key": KEY}], vigenere, alphabet) == text
@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+from conftest import ALPHABETS
+from modules.Rot_Cryp import ROT32Cipher
+from utils.alphabet import alphabets
+from utils.utils import base64_to_bytes, base64_to_text, bytes_to_base64, remove_spaces, text_to_base64
+
+# The fused ROT32 codec against the two-stage path: Base64, then the
+# _rot_encrypt / _rot_decrypt rotation
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+@pytest.mark.parametrize("length", list(range(0, 8)) + [100, 1001])
+def test_fused_matches_two_stage(alphabet, length):
+    tables = alphabets.get(alphabet)
+    cipher = ROT32Cipher(tables)
+    rng = random.Random(length)
+    data = rng.randbytes(length)
+    for text in (data.decode("latin-1"), "".join(rng.choice("ab cd\xe9€") for _ in range(length))):
+        expected = ROT32Cipher._rot_encrypt(text_to_base64(remove_spaces(text), tables), tables)
+        assert cipher.encrypt(text) == expected
+        b64 = ROT32Cipher._rot_decrypt(expected, tables)
+        assert cipher.decrypt(expected) == remove_spaces(base64_to_text(b64, tables))
+    expected = ROT32Cipher._rot_encrypt(bytes_to_base64(data, tables), tables)
+    assert cipher.encrypt_bytes(data) == expected
+    assert cipher.decrypt_bytes(expected) == base64_to_bytes(ROT32Cipher._rot_decrypt(expected, tables), tables) == data
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+def test_decrypt_rejects_foreign_symbols(alphabet):
+    with pytest.raises(ValueError):
+        ROT32Cipher(alphabets.get(alphabet)).decrypt("ab!d")
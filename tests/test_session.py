@@ -0,0 +1,24 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import conftest  # noqa: F401  (alphabets)
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize("config", [
+    {"cipher": "nope"},
+    {"cipher": "vigenere"},
+    {"cipher": "rot32", "alphabet": "unknown"},
+    {"cipher": "rot32", "key": 5},
+])
+def test_rejected_config_clears_the_session(config):
+    with client.websocket_connect("/api/session") as ws:
+        ws.send_json({"type": "config", "cipher": "rot32"})
+        assert ws.receive_json()["type"] == "ready"
+        ws.send_json({"type": "config", **config})
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"type": "encrypt", "id": 1, "text": "hello"})
+        reply = ws.receive_json()
+        assert reply["type"] == "error" and "config" in reply["detail"]
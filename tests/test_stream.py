@@ -0,0 +1,58 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import ALPHABETS
+from main import app
+from modules.Rot_Cryp import ROT32Cipher
+from modules.Vige_Cryp import VigenereCipher
+from utils.alphabet import alphabets
+
+client = TestClient(app)
+HEADERS = {"X-Cipher-Key": "stream key"}
+
+
+@pytest.mark.parametrize("cipher", ("rot32", "vigenere"))
+@pytest.mark.parametrize("op, body", [
+    ("encrypt", "non-Latin-1 € text".encode()),
+    ("encrypt", b"\xff invalid UTF-8"),
+    ("decrypt", b"!!!!"),
+])
+def test_bad_input_gets_400(cipher, op, body):
+    r = client.post(f"/api/{op}/{cipher}/stream", content=body, headers=HEADERS)
+    assert r.status_code == 400
+
+
+# Streaming encryptors and decryptors against the one-shot ciphers, with the
+# input cut at arbitrary points (inside Base64 blocks, sentinels and padding)
+KEY = "stream key"
+
+
+def _cipher(name, alphabet):
+    tables = alphabets.get(alphabet)
+    return ROT32Cipher(tables) if name == "rot32" else VigenereCipher(tables)
+
+
+def _feed(transformer, text, rng):
+    out = []
+    pos = 0
+    while pos < len(text):
+        step = rng.randrange(1, 24)
+        out.append(transformer.update(text[pos:pos + step]))
+        pos += step
+    out.append(transformer.finalize())
+    return "".join(out)
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+@pytest.mark.parametrize("cipher", ("rot32", "vigenere"))
+def test_incremental_matches_one_shot(cipher, alphabet):
+    engine = _cipher(cipher, alphabet)
+    args = () if cipher == "rot32" else (KEY,)
+    rng = random.Random(f"{cipher}-{alphabet}")
+    for _ in range(200):
+        text = "".join(rng.choice("ab  xyz\xe9\xff\n") for _ in range(rng.randrange(0, 80)))
+        ciphertext = engine.encrypt(text, *args)
+        assert _feed(engine.encryptor(*args), text, rng) == ciphertext
+        assert _feed(engine.decryptor(*args), ciphertext, rng) == engine.decrypt(ciphertext, *args)
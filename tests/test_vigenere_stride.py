@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from conftest import ALPHABETS
+from modules import numpy_backend
+from modules.Vige_Cryp import VigenereCipher
+from modules.key_schedule import KeySchedule
+from utils.alphabet import alphabets
+
+# The strided and NumPy kernels against VigenereCipher._shift_generic
+
+
+def _cases(alphabet, sign, period):
+    tables = alphabets.get(alphabet)
+    rng = random.Random(period * sign)
+    schedule = KeySchedule(bytes(rng.randrange(64) for _ in range(period)))
+    for size in (0, 1, period - 1, period, period + 1, 3 * period + 5, 1000):
+        b64 = tables.from_indices(bytes(rng.randrange(64) for _ in range(size)))
+        for offset in (0, 1, period - 1, period, 12345):
+            yield b64, schedule, sign, offset, tables
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+@pytest.mark.parametrize("sign", (1, -1))
+@pytest.mark.parametrize("period", (1, 2, 7, 64, 300))
+def test_strided_matches_generic(alphabet, sign, period):
+    for args in _cases(alphabet, sign, period):
+        assert VigenereCipher._shift_strided(*args) == VigenereCipher._shift_generic(*args)
+
+
+@pytest.mark.skipif(not numpy_backend.HAVE_NUMPY, reason="NumPy is not installed")
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+@pytest.mark.parametrize("sign", (1, -1))
+@pytest.mark.parametrize("period", (1, 2, 7, 64, 300))
+def test_numpy_matches_generic(alphabet, sign, period):
+    for b64, schedule, sign, offset, tables in _cases(alphabet, sign, period):
+        expected = VigenereCipher._shift_generic(b64, schedule, sign, offset, tables)
+        assert numpy_backend.vigenere(b64, schedule.indices, sign, offset, tables) == expected
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+def test_strided_round_trip(alphabet):
+    tables = alphabets.get(alphabet)
+    schedule = KeySchedule(bytes(range(5, 64, 7)))
+    b64 = tables.from_indices(bytes(i % 64 for i in range(500)))
+    shifted = VigenereCipher._shift_strided(b64, schedule, 1, 3, tables)
+    assert VigenereCipher._shift_strided(shifted, schedule, -1, 3, tables) == b64
@@ -0,0 +1,212 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+
+# Standard Base64 symbols; binascii encodes 3-byte blocks into these and the
+# codec tables translate them to and from the custom alphabet in one pass.
+STD_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+
+# The default alphabet comes from ALPHABET_TABLE; ALPHABET_TABLE_<NAME> adds
+# one selectable as <name> (lowercased).
+ALPHABET_ENV = "ALPHABET_TABLE"
+DEFAULT_ALPHABET = "default"
+
+
+# INDEX_ROTATIONS[k] adds k modulo 64 to every alphabet index (0-63) in one
+# translate. Tables cover all 256 byte values, the rest wrapping around, so
+# they also compose with bytes.translate.
+INDEX_ROTATIONS = tuple(bytes((i + k) & 63 for i in range(256)) for k in range(64))
+
+
+class AlphabetError(ValueError):
+    pass
+
+
+class _DropUnknown(dict):
+    # str.translate mapping that deletes characters it has no entry for
+    def __missing__(self, key):
+        return None
+
+
+def check_alphabet(chars, name=DEFAULT_ALPHABET):
+    # Exactly 64 distinct symbols, none of them the '=' padding character
+    if len(chars) != 64:
+        raise AlphabetError(f"Alphabet {name!r} must have exactly 64 characters, got {len(chars)}")
+    if '=' in chars:
+        raise AlphabetError(f"Alphabet {name!r} must not contain the padding character '='")
+    seen = set()
+    duplicates = [c for c in chars if c in seen or seen.add(c)]
+    if duplicates:
+        raise AlphabetError(f"Alphabet {name!r} has duplicate characters: {sorted(set(duplicates))}")
+
+
+class Alphabet:
+    # Lookup tables for one 64-symbol alphabet, built once so the ciphers never
+    # scan the alphabet string per character.
+
+    def __init__(self, chars, name=DEFAULT_ALPHABET):
+        check_alphabet(chars, name)
+        self.name = name
+        self.chars = chars
+        self.is_ascii = chars.isascii()
+
+        # char -> index
+        self.index = {c: i for i, c in enumerate(chars)}
+        # index -> char
+        self.reverse = tuple(chars)
+        # str.translate tables between symbols and index code points (0-63)
+        self._to_index = {ord(c): i for c, i in self.index.items()}
+        self._from_index = list(chars)
+
+        # str.translate tables for the ROT32 rotation in each direction
+        self.rot32_encrypt = {ord(c): chars[(i + 32) % 64] for c, i in self.index.items()}
+        self.rot32_decrypt = {ord(c): chars[(i - 32) % 64] for c, i in self.index.items()}
+
+        # Removing every valid symbol leaves only the invalid ones
+        self._valid = {ord(c): None for c in self.index}
+        self._valid_or_padding = dict(self._valid)
+        self._valid_or_padding[ord('=')] = None
+
+        self._build_codec_tables()
+        self._rot32 = None
+        self._shift_tables = None
+
+    def _build_codec_tables(self):
+        chars = self.chars
+        if self.is_ascii:
+            self.encode_table = bytes.maketrans(STD_ALPHABET, chars.encode("ascii"))
+        else:
+            encode = [chr(i) for i in range(256)]
+            for std, c in zip(STD_ALPHABET, chars):
+                encode[std] = c
+            self.encode_table = encode
+
+        decode = bytearray(range(256))
+        self.decode_map = _DropUnknown()
+        for c, i in self.index.items():
+            self.decode_map[ord(c)] = chr(STD_ALPHABET[i])
+            if self.is_ascii:
+                decode[ord(c)] = STD_ALPHABET[i]
+        self.decode_table = bytes(decode)
+
+        if self.is_ascii:
+            to_index = bytearray(256)
+            for c, i in self.index.items():
+                to_index[ord(c)] = i
+            self.to_index_table = bytes(to_index)
+            self.from_index_table = chars.encode("ascii") * 4
+            self._valid_bytes = chars.encode("ascii")
+            self._valid_or_padding_bytes = self._valid_bytes + b"="
+        self.decode_delete = bytes(b for b in range(256) if b >= 128 or chr(b) not in self.index)
+
+    @property
+    def rot32(self):
+        # ROT32 of Base64 in this alphabet is plain Base64 in the alphabet
+        # rotated by 32, so its codec tables encode and decode ROT32
+        # ciphertext in one pass with no intermediate Base64 string
+        if self._rot32 is None:
+            self._rot32 = Alphabet(self.chars[32:] + self.chars[:32], self.name + "/rot32")
+        return self._rot32
+
+    @property
+    def shift_tables(self):
+        # ASCII alphabets only: shift_tables[k] translates every symbol
+        # straight to the symbol k positions further on (Vigenere fast path)
+        if self._shift_tables is None:
+            raw = self.chars.encode("ascii")
+            self._shift_tables = tuple(bytes.maketrans(raw, raw[k:] + raw[:k]) for k in range(64))
+        return self._shift_tables
+
+    def to_ascii(self, s):
+        # Validated symbols of an ASCII alphabet as bytes, for translating
+        # through shift_tables
+        raw = s.encode("ascii")
+        if raw.translate(None, self._valid_bytes):
+            self.validate(s)
+        return raw
+
+    def to_indices(self, s):
+        # Symbols -> bytes of alphabet indices
+        if self.is_ascii and s.isascii():
+            return self.to_ascii(s).translate(self.to_index_table)
+        self.validate(s)
+        return s.translate(self._to_index).encode("latin-1")
+
+    def from_indices(self, indices):
+        # Bytes of alphabet indices (0-63) -> symbols
+        if self.is_ascii:
+            return bytes(indices).translate(self.from_index_table).decode("ascii")
+        return bytes(indices).decode("latin-1").translate(self._from_index)
+
+    def invalid_chars(self, s, allow_padding=False):
+        if self.is_ascii and s.isascii():
+            valid = self._valid_or_padding_bytes if allow_padding else self._valid_bytes
+            return s.encode("ascii").translate(None, valid).decode("ascii")
+        return s.translate(self._valid_or_padding if allow_padding else self._valid)
+
+    def validate(self, s, allow_padding=False):
+        invalid = self.invalid_chars(s, allow_padding)
+        if invalid:
+            raise ValueError(f"Invalid Base64 characters: {list(invalid)}")
+        return True
+
+
+def _legacy_pad(chars):
+    # Older configs left out '+' and '/'; they are appended when missing
+    if len(chars) != 64:
+        if '+' not in chars:
+            chars += '+'
+        if '/' not in chars:
+            chars += '/'
+    return chars
+
+
+class AlphabetRegistry:
+    # Every configured alphabet, read from the environment (and .env) once on
+    # first use and compiled into tables up front, so a bad configuration
+    # fails at startup instead of on some later request.
+
+    def __init__(self, environ=None):
+        self._environ = environ
+        self._alphabets = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._alphabets is not None:
+            return self._alphabets
+        with self._lock:
+            if self._alphabets is None:
+                if self._environ is None:
+                    load_dotenv()
+                environ = os.environ if self._environ is None else self._environ
+                if not environ.get(ALPHABET_ENV):
+                    raise AlphabetError(f"{ALPHABET_ENV} is not set; define a 64-character alphabet in the environment or .env")
+                alphabets = {DEFAULT_ALPHABET: Alphabet(_legacy_pad(environ[ALPHABET_ENV]), DEFAULT_ALPHABET)}
+                prefix = ALPHABET_ENV + "_"
+                for var, chars in sorted(environ.items()):
+                    if var.startswith(prefix) and len(var) > len(prefix):
+                        name = var[len(prefix):].lower()
+                        alphabets[name] = Alphabet(_legacy_pad(chars), name)
+                self._alphabets = alphabets
+        return self._alphabets
+
+    @property
+    def default(self):
+        alphabets = self._alphabets or self.load()
+        return alphabets[DEFAULT_ALPHABET]
+
+    def get(self, name=None):
+        alphabets = self._alphabets or self.load()
+        if name is None:
+            return alphabets[DEFAULT_ALPHABET]
+        try:
+            return alphabets[name]
+        except KeyError:
+            raise AlphabetError(f"Unknown alphabet {name!r}; configured: {', '.join(alphabets)}") from None
+
+    def names(self):
+        return list(self._alphabets or self.load())
+
+
+alphabets = AlphabetRegistry()
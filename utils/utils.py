@@ -1,26 +1,51 @@
 import os
 import base64
-from dotenv import load_dotenv
+import binascii
+from utils.alphabet import Alphabet, AlphabetError, alphabets
 
-load_dotenv()
+# The configured alphabets live in utils.alphabet.alphabets. Every codec
+# function takes an optional Alphabet and falls back to the default one.
+# ALPHABET and ALPHABET_TABLES are still importable from here and resolve to
+# the default alphabet on first access.
+def __getattr__(name):
+    if name == "ALPHABET_TABLES":
+        return alphabets.default
+    if name == "ALPHABET":
+        return alphabets.default.chars
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-ALPHABET = os.getenv("ALPHABET_TABLE")
+_SIX_BITS = tuple(f"{i:06b}" for i in range(64))
 
-# Ensure ALPHABET has all 64 characters
-if len(ALPHABET) != 64:
-    print(f"Warning: ALPHABET has {len(ALPHABET)} characters, should be 64")
-    if '+' not in ALPHABET:
-        ALPHABET += '+'
-    if '/' not in ALPHABET:
-        ALPHABET += '/'
+SPACE_SENTINEL = "removethisspacelmao"
 
 # Convert message to one string
 def remove_spaces(m):
-    return m.replace(" ", "removethisspacelmao")
+    return m.replace(" ", SPACE_SENTINEL)
 
 # Get message to one string
 def return_spaces(m):
-    return m.replace("removethisspacelmao", " ")
+    return m.replace(SPACE_SENTINEL, " ")
+
+class SpaceRestorer:
+    # Incremental return_spaces: text that could be the start of a sentinel is
+    # held back until the next chunk shows whether it completes one
+    def __init__(self):
+        self._pending = ""
+
+    def update(self, text):
+        text = self._pending + text
+        size = len(SPACE_SENTINEL)
+        cut = max(0, len(text) - size + 1)
+        # The sentinel can't overlap itself, so at most one occurrence straddles the cut
+        start = text.find(SPACE_SENTINEL, max(0, cut - size + 1))
+        if start != -1 and start < cut:
+            cut = start + size
+        self._pending = text[cut:]
+        return return_spaces(text[:cut])
+
+    def finalize(self):
+        text, self._pending = self._pending, ""
+        return return_spaces(text)
 
 
 def char_to_ascii_bits(s):
@@ -36,40 +61,25 @@ def ascii_bits_to_char(bits):
             chars.append(chr(int(byte, 2)))
     return ''.join(chars)
 
-def bits_to_base64(bits):
-    # group into 6-bit chunks
-    six_bit_groups = []
-    for i in range(0, len(bits), 6):
-        group = bits[i:i+6]
-        # pad the last group if needed
-        if len(group) < 6:
-            group = group.ljust(6, '0')
-        six_bit_groups.append(group)
-    
-    # convert each 6-bit group to Base64 character
-    result = ""
-    for group in six_bit_groups:
-        index = int(group, 2)
-        result += ALPHABET[index]
+def bits_to_base64(bits, alphabet=None):
+    # group into 6-bit chunks, padding the last group if needed, and map each to a Base64 character
+    reverse = (alphabet or alphabets.default).reverse
+    result = ''.join([
+        reverse[int(bits[i:i+6].ljust(6, '0'), 2)]
+        for i in range(0, len(bits), 6)
+    ])
     
     # Add padding 
     padding = (4 - (len(result) % 4)) % 4
-    result += '=' * padding
-    
-    return result
+    return result + '=' * padding
 
-def base64_to_bits(b64):
+def base64_to_bits(b64, alphabet=None):
     # remove padding
     b64 = b64.rstrip('=')
     
     # Convert each character to 6-bit value
-    bits = ""
-    for char in b64:
-        if char in ALPHABET:
-            index = ALPHABET.index(char)
-            bits += f"{index:06b}"
-    
-    return bits
+    index = (alphabet or alphabets.default).index
+    return ''.join([_SIX_BITS[index[char]] for char in b64 if char in index])
 
 def bits_to_bytes(bits):
     padding = (8 - len(bits) % 8) % 8
@@ -85,14 +95,87 @@ def bits_to_bytes(bits):
 def bytes_to_bits(bytes_data):
     return ''.join(f"{byte:08b}" for byte in bytes_data)
 
+def bytes_to_base64(data, alphabet=None):
+    # Same output as bits_to_base64(bytes_to_bits(data)) without the bit string
+    tables = alphabet or alphabets.default
+    std = binascii.b2a_base64(data, newline=False)
+    if tables.is_ascii:
+        return std.translate(tables.encode_table).decode("ascii")
+    return std.decode("ascii").translate(tables.encode_table)
+
+def _to_std_symbols(b64, alphabet=None):
+    # Custom symbols -> standard Base64 symbols, dropping anything outside the alphabet
+    tables = alphabet or alphabets.default
+    if tables.is_ascii and b64.isascii():
+        return b64.encode("ascii").translate(tables.decode_table, tables.decode_delete)
+    return b64.translate(tables.decode_map).encode("ascii")
+
+def _std_symbols_to_bytes(std):
+    # A lone trailing symbol holds fewer than 8 bits and decodes to nothing
+    if len(std) % 4 == 1:
+        std = std[:-1]
+    return binascii.a2b_base64(std + b"=" * (-len(std) % 4))
+
+def base64_to_bytes(b64, alphabet=None):
+    # Same output as bits_to_bytes(base64_to_bits(b64)) truncated to whole bytes
+    return _std_symbols_to_bytes(_to_std_symbols(b64.rstrip('='), alphabet))
+
+class Base64Encoder:
+    # Incremental bytes_to_base64: the 0-2 bytes that don't fill a 3-byte
+    # block are carried into the next update()
+    def __init__(self, alphabet=None):
+        self._alphabet = alphabet
+        self._pending = b""
+
+    def update(self, data):
+        data = self._pending + bytes(data)
+        cut = len(data) - len(data) % 3
+        self._pending = data[cut:]
+        return bytes_to_base64(data[:cut], self._alphabet)
+
+    def finalize(self):
+        data, self._pending = self._pending, b""
+        return bytes_to_base64(data, self._alphabet)
+
+class Base64Decoder:
+    # Incremental base64_to_bytes: symbols that don't fill a 4-symbol block
+    # are carried over, and trailing '=' is held back until it is known to
+    # be the end of the input
+    def __init__(self, alphabet=None):
+        self._alphabet = alphabet
+        self._padding = ""
+        self._pending = b""
+
+    def update(self, b64):
+        b64 = self._padding + b64
+        body = b64.rstrip('=')
+        self._padding = b64[len(body):]
+        std = self._pending + _to_std_symbols(body, self._alphabet)
+        cut = len(std) - len(std) % 4
+        self._pending = std[cut:]
+        return binascii.a2b_base64(std[:cut])
+
+    def finalize(self):
+        std, self._pending, self._padding = self._pending, b"", ""
+        return _std_symbols_to_bytes(std)
+
+def text_to_base64(s, alphabet=None):
+    try:
+        data = s.encode("latin-1")
+    except UnicodeEncodeError:
+        # Code points above 0xFF are wider than 8 bits in char_to_ascii_bits,
+        # so they keep going through the bit-string path
+        return bits_to_base64(char_to_ascii_bits(s), alphabet)
+    return bytes_to_base64(data, alphabet)
+
+def base64_to_text(b64, alphabet=None):
+    return base64_to_bytes(b64, alphabet).decode("latin-1")
+
 def repeat_key(key, length):
     return (key * (length // len(key) + 1))[:length]
 
-def validate_base64_string(s):
-    invalid_chars = [c for c in s if c not in ALPHABET and c != '=']
-    if invalid_chars:
-        raise ValueError(f"Invalid Base64 characters: {invalid_chars}")
-    return True
+def validate_base64_string(s, alphabet=None):
+    return (alphabet or alphabets.default).validate(s, allow_padding=True)
 
 if __name__ == "__main__":
     text = "Crypto"